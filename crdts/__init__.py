@@ -10,6 +10,7 @@ from crdts.classes import (
     RGArray,
     LWWRegister,
     LWWMap,
+    LWWMapView,
     MVRegister,
     MVMap,
     CausalTree,
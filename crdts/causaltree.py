@@ -11,6 +11,7 @@ from .errors import tressa, tert, vert
 from .interfaces import (
     ClockProtocol,
     StateUpdateProtocol,
+    fast_isinstance,
 )
 from .lwwmap import LWWMap
 from .merkle import get_merkle_history, resolve_merkle_histories
@@ -36,7 +37,7 @@ class CausalTree:
         """
         tert(type(positions) is LWWMap or positions is None,
             'positions must be an LWWMap or None')
-        tert(isinstance(clock, ClockProtocol) or clock is None,
+        tert(fast_isinstance(clock, ClockProtocol) or clock is None,
             'clock must be a ClockProtocol or None')
         if listeners is None:
             listeners = []
@@ -111,7 +112,7 @@ class CausalTree:
             TypeError or ValueError for invalid state_update.clock_uuid
             or state_update.data.
         """
-        tert(isinstance(state_update, StateUpdateProtocol),
+        tert(fast_isinstance(state_update, StateUpdateProtocol),
             'state_update must be instance implementing StateUpdateProtocol')
         vert(state_update.clock_uuid == self.clock.uuid,
             'state_update.clock_uuid must equal CRDT.clock.uuid')
@@ -3,7 +3,7 @@ from .counter import Counter
 from .counterset import CounterSet
 from .fiarray import FIArray
 from .gset import GSet
-from .lwwmap import LWWMap
+from .lwwmap import LWWMap, LWWMapView
 from .lwwregister import LWWRegister
 from .mvregister import MVRegister
 from .mvmap import MVMap
@@ -1,6 +1,6 @@
 from __future__ import annotations
 from .errors import tert, vert
-from .interfaces import ClockProtocol, StateUpdateProtocol
+from .interfaces import ClockProtocol, StateUpdateProtocol, fast_isinstance
 from .merkle import get_merkle_history, resolve_merkle_histories
 from .scalarclock import ScalarClock
 from .stateupdate import StateUpdate
@@ -40,7 +40,7 @@ class Counter:
             TypeError or ValueError on invalid state_update.clock_uuid
             or state_update.data.
         """
-        tert(isinstance(state_update, StateUpdateProtocol),
+        tert(fast_isinstance(state_update, StateUpdateProtocol),
             'state_update must be instance implementing StateUpdateProtocol')
         vert(state_update.clock_uuid == self.clock.uuid,
             'state_update.clock_uuid must equal CRDT.clock.uuid')
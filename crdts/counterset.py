@@ -1,6 +1,6 @@
 from __future__ import annotations
 from .errors import tert, vert
-from .interfaces import ClockProtocol, StateUpdateProtocol
+from .interfaces import ClockProtocol, StateUpdateProtocol, fast_isinstance
 from .merkle import get_merkle_history, resolve_merkle_histories
 from .gset import GSet
 from .pncounter import PNCounter
@@ -30,7 +30,7 @@ class CounterSet:
         """
         if uuid is None or not isinstance(uuid, bytes):
             uuid = uuid4().bytes
-        if clock is None or not isinstance(clock, ClockProtocol):
+        if clock is None or not fast_isinstance(clock, ClockProtocol):
             clock = ScalarClock(uuid=uuid)
         if counter_ids is None or not isinstance(counter_ids, GSet):
             counter_ids = GSet(clock=clock)
@@ -101,7 +101,7 @@ class CounterSet:
             TypeError or ValueError for invalid state_update.clock_uuid
             or state_update.data.
         """
-        tert(isinstance(state_update, StateUpdateProtocol),
+        tert(fast_isinstance(state_update, StateUpdateProtocol),
             'state_update must be instance implementing StateUpdateProtocol')
         vert(state_update.clock_uuid == self.clock.uuid,
             'state_update.clock_uuid must equal CRDT.clock.uuid')
@@ -20,7 +20,9 @@ class StrWrapper:
         return hash(self.__to_tuple__())
 
     def __eq__(self, other: DataWrapperProtocol) -> bool:
-        return type(self) == type(other) and hash(self) == hash(other)
+        # compare the tuples directly: hashing both sides costs more on
+        # every dict hit and treats colliding hashes (e.g. -1, -2) as equal
+        return type(self) == type(other) and self.__to_tuple__() == other.__to_tuple__()
 
     def __ne__(self, other: DataWrapperProtocol) -> bool:
         return not self.__eq__(other)
@@ -38,7 +40,7 @@ class StrWrapper:
         return other.value >= self.value
 
     def pack(self) -> bytes:
-        data = bytes(self.value, 'utf-8')
+        data = self.value.encode('utf-8')
         return struct.pack(f'!{len(data)}s', data)
 
     @classmethod
@@ -93,7 +95,7 @@ class CTDataWrapper:
         return hash(self.__to_tuple__())
 
     def __eq__(self, other: CTDataWrapper) -> bool:
-        return type(self) == type(other) and hash(self) == hash(other)
+        return type(self) == type(other) and self.__to_tuple__() == other.__to_tuple__()
 
     def __ne__(self, other: CTDataWrapper) -> bool:
         return not self.__eq__(other)
@@ -137,7 +139,8 @@ class DecimalWrapper(StrWrapper):
         self.value = value
 
     def pack(self) -> bytes:
-        return struct.pack(f'!{len(str(self.value))}s', bytes(str(self.value), 'utf-8'))
+        data = str(self.value).encode('utf-8')
+        return struct.pack(f'!{len(data)}s', data)
 
     @classmethod
     def unpack(cls, data: bytes, /, *, inject: dict = {}) -> DecimalWrapper:
@@ -160,6 +163,9 @@ class FIAItemWrapper:
         self.index = index if isinstance(index, DecimalWrapper) else DecimalWrapper(index)
         self.uuid = uuid
 
+    def __to_tuple__(self) -> tuple:
+        return (self.__class__.__name__, self.value, self.index, self.uuid)
+
     def __hash__(self) -> int:
         return hash((self.value, self.index, self.uuid))
 
@@ -167,7 +173,7 @@ class FIAItemWrapper:
         return f'FIAItemWrapper(value={self.value}, index={self.index.value}, uuid={self.uuid.hex()}'
 
     def __eq__(self, other) -> bool:
-        return type(other) == type(self) and hash(self) == hash(other)
+        return type(other) == type(self) and self.__to_tuple__() == other.__to_tuple__()
 
     def __ne__(self, other) -> bool:
         return not (self == other)
@@ -287,3 +293,10 @@ class NoneWrapper:
     @classmethod
     def unpack(cls, data: bytes, /, *, inject: dict = {}) -> NoneWrapper:
         return cls()
+
+
+# wrappers whose only field is immutable, so read() can copy them by
+# rebuilding them from that field instead of packing and unpacking
+_SCALAR_WRAPPERS = frozenset([
+    BytesWrapper, DecimalWrapper, IntWrapper, NoneWrapper, StrWrapper
+])
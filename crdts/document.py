@@ -8,6 +8,7 @@ from .interfaces import (
     ClockProtocol,
     CRDTProtocol,
     StateUpdateProtocol,
+    fast_isinstance,
 )
 from .lwwmap import LWWMap, LWWRegister, ORSet
 from .merkle import get_merkle_history, resolve_merkle_histories
@@ -77,7 +78,7 @@ class Document:
                  parts: dict[Identifier, CRDTProtocol] = {}) -> None:
         if uuid is None or not isinstance(uuid, bytes):
             uuid = uuid4()
-        if clock is None or not isinstance(clock, ClockProtocol):
+        if clock is None or not fast_isinstance(clock, ClockProtocol):
             clock = ScalarClock(uuid=uuid)
         if elements is None or not isinstance(elements, ORSet):
             elements = ORSet(clock=clock)
@@ -86,7 +87,7 @@ class Document:
         for k, v in parts.items():
             tressa(isinstance(k, Identifier),
                    'parts must be dict[Identifier, CRDTProtocol]')
-            tressa(isinstance(v, CRDTProtocol),
+            tressa(fast_isinstance(v, CRDTProtocol),
                    'parts must be dict[Identifier, CRDTProtocol]')
 
         self.clock = clock
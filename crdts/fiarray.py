@@ -11,6 +11,7 @@ from .errors import tressa, tert, vert
 from .interfaces import (
     ClockProtocol,
     StateUpdateProtocol,
+    fast_isinstance,
 )
 from .lwwmap import LWWMap
 from .merkle import get_merkle_history, resolve_merkle_histories
@@ -39,7 +40,7 @@ class FIArray:
         """
         tert(type(positions) is LWWMap or positions is None,
             'positions must be an LWWMap or None')
-        tert(isinstance(clock, ClockProtocol) or clock is None,
+        tert(fast_isinstance(clock, ClockProtocol) or clock is None,
             'clock must be a ClockProtocol or None')
         if listeners is None:
             listeners = []
@@ -104,7 +105,7 @@ class FIArray:
         """Apply an update and return self (monad pattern). Raises
             TypeError or ValueError for invalid state_update.
         """
-        tert(isinstance(state_update, StateUpdateProtocol),
+        tert(fast_isinstance(state_update, StateUpdateProtocol),
             'state_update must be instance implementing StateUpdateProtocol')
         vert(state_update.clock_uuid == self.clock.uuid,
             'state_update.clock_uuid must equal CRDT.clock.uuid')
@@ -1,6 +1,10 @@
 from __future__ import annotations
-from packify import SerializableType
+from decimal import Decimal
+from packify import Packable, SerializableType, pack
+from types import NoneType
 from typing import Any, Callable, Hashable, Protocol, Type, runtime_checkable
+from weakref import WeakKeyDictionary
+import struct
 
 
 @runtime_checkable
@@ -202,3 +206,95 @@ class StateUpdateProtocol(Protocol):
     def unpack(cls, data: bytes, /, *, inject: dict = {}) -> StateUpdateProtocol:
         """Unpack an instance from bytes."""
         ...
+
+
+_implementations: dict[type, WeakKeyDictionary[type, bool]] = {}
+_data_members: dict[type, tuple[str, ...]] = {}
+
+def fast_isinstance(obj: Any, protocol: type) -> bool:
+    """Like isinstance(obj, protocol) for a runtime_checkable Protocol,
+        but caches positive results keyed on type(obj) so that repeated
+        checks skip the structural Protocol check. Methods are assumed
+        to come from the class, so they are only checked once per type;
+        data members declared by the protocol are still checked on each
+        object, since one instance of a class may lack them.
+    """
+    implementations = _implementations.get(protocol)
+    if implementations is None:
+        implementations = _implementations[protocol] = WeakKeyDictionary()
+        _data_members[protocol] = tuple(getattr(protocol, '__annotations__', {}))
+
+    cls = type(obj)
+    if cls in implementations:
+        for name in _data_members[protocol]:
+            if not hasattr(obj, name):
+                return False
+        return True
+    if isinstance(obj, protocol):
+        implementations[cls] = True
+        return True
+    return False
+
+
+# the built-in members of SerializableType, checked by exact type
+_SERIALIZABLE_TYPES = frozenset({
+    dict, list, set, tuple, int, float, Decimal, str, bytes, bytearray, NoneType
+})
+
+def is_serializable(value: Any) -> bool:
+    """Equivalent to isinstance(value, SerializableType), but checks
+        the exact built-in types first and caches the Packable Protocol
+        check for other types.
+    """
+    return type(value) in _SERIALIZABLE_TYPES or fast_isinstance(value, SerializableType)
+
+
+# packify item header: 1-byte type code and 4-byte payload length
+_ITEM_HEADER = struct.Struct('!1sI')
+
+# str(SerializableType) walks the whole Union, so format it only once
+# rather than every time an error message is built for a check
+_SERIALIZABLE_TYPE = str(SerializableType)
+
+# values of these types cannot be mutated, so read() can return them as-is
+_IMMUTABLE_TYPES = frozenset([bool, bytes, Decimal, float, int, NoneType, str])
+
+def _unpack_dependencies(dependencies: dict, inject: dict) -> dict:
+    """Return the classes packify may need to unpack a CRDT's data,
+        only building a merged dict when something is injected.
+    """
+    return {**dependencies, **inject} if inject else dependencies
+
+
+_pack_header = _ITEM_HEADER.pack
+_pack_int = struct.Struct('!1sII').pack
+_packable_prefixes: WeakKeyDictionary[type, bytes] = WeakKeyDictionary()
+
+def fast_pack(value: SerializableType) -> bytes:
+    """Equivalent to packify.pack(value), but encodes int, str, bytes,
+        None, and Packables directly with struct, skipping the Packable
+        Protocol checks packify runs on every value.
+    """
+    cls = type(value)
+    if cls is int and 0 <= value <= 0xFFFFFFFF:
+        return _pack_int(b'i', 4, value)
+    if cls is bytes:
+        return _pack_header(b'b', len(value)) + value
+    if cls is str:
+        value = value.encode('utf-8')
+        return _pack_header(b's', len(value)) + value
+    if value is None:
+        return _pack_header(b'n', 0)
+    if cls not in _SERIALIZABLE_TYPES and fast_isinstance(value, Packable):
+        # packify frames a Packable as hex(class name) + '_' + value.pack();
+        # joining the fragments once copies the packed value only once
+        prefix = _packable_prefixes.get(cls)
+        if prefix is None:
+            prefix = cls.__name__.encode('utf-8').hex().encode('utf-8')
+            _packable_prefixes[cls] = prefix
+        packed = value.pack()
+        return b''.join((
+            _pack_header(b'p', len(prefix) + 1 + len(packed)),
+            prefix, b'_', packed,
+        ))
+    return pack(value)
@@ -8,15 +8,22 @@ from .datawrappers import (
     NoneWrapper,
 )
 from .errors import tressa, tert, vert
-from .interfaces import ClockProtocol, StateUpdateProtocol
+from .interfaces import (
+    ClockProtocol,
+    StateUpdateProtocol,
+    fast_isinstance,
+    is_serializable,
+    _ITEM_HEADER,
+    _unpack_dependencies,
+)
 from .lwwregister import LWWRegister
 from .merkle import get_merkle_history, resolve_merkle_histories
 from .orset import ORSet
 from .scalarclock import ScalarClock
 from .stateupdate import StateUpdate
-from binascii import crc32
 from packify import SerializableType, pack, unpack
-from typing import Any, Callable, Hashable, Type
+from typing import Any, Callable, Generator, Hashable, Optional, Type
+from zlib import crc32
 
 
 class LWWMap:
@@ -27,6 +34,7 @@ class LWWMap:
     registers: dict[SerializableType, LWWRegister]
     clock: ClockProtocol
     listeners: list[Callable]
+    merkle_cache: Optional[tuple]
 
     def __init__(self, names: ORSet = None, registers: dict = None,
                 clock: ClockProtocol = None, listeners: list[Callable] = None
@@ -39,7 +47,7 @@ class LWWMap:
             'names must be an ORSet or None')
         tert(type(registers) is dict or registers is None,
             'registers must be a dict mapping names to LWWRegisters or None')
-        tert(isinstance(clock, ClockProtocol) or clock is None,
+        tert(fast_isinstance(clock, ClockProtocol) or clock is None,
             'clock must be a ClockProtocol or None')
         if listeners is None:
             listeners = []
@@ -55,8 +63,9 @@ class LWWMap:
 
         names.clock = clock
 
+        known_names = names.observed | names.removed
         for name in registers:
-            tressa(name in names.observed or name in names.removed,
+            tressa(name in known_names,
                 'each register name must be in the names ORSet')
             tert(type(registers[name]) is LWWRegister,
                 'each element of registers must be an LWWRegister')
@@ -66,6 +75,7 @@ class LWWMap:
         self.registers = registers
         self.clock = clock
         self.listeners = listeners
+        self.merkle_cache = None
 
     def pack(self) -> bytes:
         """Pack the data and metadata into a bytes string. Raises
@@ -82,15 +92,18 @@ class LWWMap:
         """Unpack the data bytes string into an instance. Raises
             packify.UsageError or ValueError on failure.
         """
-        clock, names, registers = unpack(data, inject={**globals(), **inject})
+        clock, names, registers = unpack(
+            data, inject=_unpack_dependencies(_UNPACK_DEPENDENCIES, inject)
+        )
         return cls(names, registers, clock)
 
     def read(self, inject: dict = {}) -> dict:
         """Return the eventually consistent data view."""
-        result = {}
+        registers = self.registers
+        result = dict.fromkeys(self.names.read())
 
-        for name in self.names.read():
-            result[name] = self.registers[name].read(inject=inject)
+        for name in result:
+            result[name] = registers[name].read(inject=inject)
 
         return result
 
@@ -99,7 +112,7 @@ class LWWMap:
         """Apply an update and return self (monad pattern). Raises
             TypeError or ValueError for invalid state_update.
         """
-        tert(isinstance(state_update, StateUpdateProtocol),
+        tert(fast_isinstance(state_update, StateUpdateProtocol),
             'state_update must be instance implementing StateUpdateProtocol')
         vert(state_update.clock_uuid == self.clock.uuid,
             'state_update.clock_uuid must equal CRDT.clock.uuid')
@@ -113,35 +126,48 @@ class LWWMap:
             "state_update.data[0] must be str op one of ('o', 'r')")
         tert(isinstance(name, Hashable),
             'state_update.data[1] must be Hashable name')
-        tert(isinstance(name, SerializableType),
+        tert(is_serializable(name),
             'state_update.data[1] must be SerializableType name')
-        tert(isinstance(writer, SerializableType),
+        tert(is_serializable(writer),
             f'state_update.data[2] must be writer SerializableType ({SerializableType})')
-        tert(isinstance(value, SerializableType),
+        tert(is_serializable(value),
             'state_update.data[3] must be SerializableType value')
 
+        return self._apply(state_update)
+
+    def _apply(self, state_update: StateUpdateProtocol) -> LWWMap:
+        """Apply an already validated update and return self. Used by
+            set and unset to skip re-validating the updates they build.
+        """
         self.invoke_listeners(state_update)
+        op, name, writer, value = state_update.data
         ts = state_update.ts
         update_class = state_update.__class__
+        clock_uuid = self.clock.uuid
+
+        # invalidate cache
+        self.merkle_cache = None
 
         if op == 'o':
             # try to add to the names ORSet
-            self.names.update(update_class(self.clock.uuid, ts, ('o', name)))
+            self.names.update(update_class(clock_uuid, ts, ('o', name)))
 
-            # if register missing and name added successfully, create register
-            if name not in self.registers and name in self.names.read():
+            # if register missing and name added successfully, create register;
+            # ORSet keeps observed and removed disjoint, so a member of
+            # observed is in names.read() and this avoids materializing it
+            if name not in self.registers and name in self.names.observed:
                 self.registers[name] = LWWRegister(name, value, self.clock, ts, writer)
 
         if op == 'r':
             # try to remove from the names ORSet
-            self.names.update(update_class(self.clock.uuid, ts, ('r', name)))
+            self.names.update(update_class(clock_uuid, ts, ('r', name)))
 
-            if name not in self.names.read() and name in self.registers:
+            if name not in self.names.observed and name in self.registers:
                 del self.registers[name]
 
         # if the register exists, update it
         if name in self.registers:
-            self.registers[name].update(update_class(self.clock.uuid, ts, (writer, value)))
+            self.registers[name].update(update_class(clock_uuid, ts, (writer, value)))
 
         return self
 
@@ -154,19 +180,25 @@ class LWWMap:
         total_last_writer = 0
         total_register_crc32 = 0
 
-        for name in self.registers:
-            ts = self.registers[name].last_update
-            if from_ts is not None:
-                if self.clock.is_later(from_ts, ts):
-                    continue
-            if until_ts is not None:
-                if self.clock.is_later(ts, until_ts):
-                    continue
+        # filter by the ts window up front, and only when one is given
+        registers = self.registers.values()
+        if from_ts is not None or until_ts is not None:
+            is_later = self.clock.is_later
+            registers = [
+                register for register in registers
+                if (from_ts is None or not is_later(from_ts, register.last_update))
+                and (until_ts is None or not is_later(register.last_update, until_ts))
+            ]
+
+        for register in registers:
+            # chaining the crc is equivalent to crc32(name + value); the
+            # per-field crcs are cached by the register until it changes
             total_register_crc32 += crc32(
-                pack(self.registers[name].name) + pack(self.registers[name].value)
+                register.packed_field('value'),
+                register.field_checksum('name')
             )
-            total_last_update += crc32(pack(self.registers[name].last_update))
-            total_last_writer += crc32(pack(self.registers[name].last_writer))
+            total_last_update += register.field_checksum('last_update')
+            total_last_writer += register.field_checksum('last_writer')
 
         return (
             total_last_update % 2**32,
@@ -181,39 +213,103 @@ class LWWMap:
             converge to the underlying data. Useful for
             resynchronization by replaying updates from divergent nodes.
         """
-        registers_history: dict[SerializableType, tuple[StateUpdateProtocol]] = {}
+        return tuple(self.iter_history(
+            from_ts=from_ts,
+            until_ts=until_ts,
+            update_class=update_class,
+        ))
+
+    def iter_history(self, /, *, from_ts: Any = None, until_ts: Any = None,
+                update_class: Type[StateUpdateProtocol] = StateUpdate
+                ) -> Generator[StateUpdateProtocol, None, None]:
+        """Yields the concise history of StateUpdateProtocols one at a
+            time. The names ORSet history is built up front, but each
+            register's history is only built when its name is reached.
+            Useful for streaming updates to other nodes.
+        """
         orset_history = self.names.history(
             from_ts=from_ts,
             until_ts=until_ts,
             update_class=update_class,
         )
-        history = []
-
-        for name in self.registers:
-            registers_history[name] = self.registers[name].history(
-                from_ts=from_ts,
-                until_ts=until_ts,
-                update_class=update_class,
-            )
+        registers = self.registers
 
+        # each name is either observed or removed, so every register's
+        # history is built at most once
         for update in orset_history:
-            name = update.data[1]
-            if name in registers_history:
-                register_update = registers_history[name][0]
-                update_class = register_update.__class__
-                history.append(update_class(
-                    clock_uuid=update.clock_uuid,
+            op, name = update.data
+            clock_uuid = update.clock_uuid
+            if name in registers:
+                register_history = registers[name].history(
+                    from_ts=from_ts,
+                    until_ts=until_ts,
+                    update_class=update_class,
+                )
+                if not register_history:
+                    # the register state falls outside of the ts window
+                    continue
+                register_update = register_history[0]
+                writer, value = register_update.data
+                yield update_class(
+                    clock_uuid=clock_uuid,
                     ts=register_update.ts,
-                    data=(update.data[0], name, register_update.data[0], register_update.data[1])
-                ))
+                    data=(op, name, writer, value)
+                )
             else:
-                history.append(update_class(
-                    clock_uuid=update.clock_uuid,
+                yield update_class(
+                    clock_uuid=clock_uuid,
                     ts=update.ts,
-                    data=(update.data[0], name, 0, None)
-                ))
+                    data=(op, name, 0, None)
+                )
+
+    def delta_since(self, ts: Any, /, *,
+                    update_class: Type[StateUpdateProtocol] = StateUpdate
+                    ) -> tuple[StateUpdateProtocol]:
+        """Returns only the StateUpdateProtocols from the concise
+            history that are later than ts. Useful for incremental
+            synchronization with a node last synced at ts.
+        """
+        return tuple(
+            update
+            for update in self.iter_history(from_ts=ts, update_class=update_class)
+            if self.clock.is_later(update.ts, ts)
+        )
+
+    def pack_delta(self, ts: Any, /, *,
+                   update_class: Type[StateUpdateProtocol] = StateUpdate) -> bytes:
+        """Pack the updates from delta_since(ts) into a single bytes
+            string to be applied by a remote node with merge_delta.
+            Raises packify.UsageError on failure.
+        """
+        return pack([
+            update.pack()
+            for update in self.delta_since(ts, update_class=update_class)
+        ])
 
-        return tuple(history)
+    def merge_delta(self, delta: bytes, /, *,
+                    update_class: Type[StateUpdateProtocol] = StateUpdate,
+                    inject: dict = {}) -> LWWMap:
+        """Apply a delta produced by pack_delta and return self (monad
+            pattern). Raises TypeError for invalid delta or
+            packify.UsageError on failure.
+        """
+        tert(type(delta) in (bytes, bytearray), 'delta must be bytes or bytearray')
+        dependencies = _unpack_dependencies(_UNPACK_DEPENDENCIES, inject)
+        packed_updates = unpack(delta, inject=dependencies)
+        tert(type(packed_updates) is list and
+            all(type(p) is bytes for p in packed_updates),
+            'delta must be a packed list of packed state updates')
+
+        # unpack every update before applying any so that a bad entry
+        # cannot leave the map partially merged
+        updates = [
+            update_class.unpack(packed, inject=dependencies)
+            for packed in packed_updates
+        ]
+        for state_update in updates:
+            self.update(state_update)
+
+        return self
 
     def get_merkle_history(self, /, *,
                            update_class: Type[StateUpdateProtocol] = StateUpdate
@@ -222,9 +318,17 @@ class LWWMap:
             [root, [content_id for update in self.history()], {
             content_id: packed for update in self.history()}] where
             packed is the result of update.pack() and content_id is the
-            sha256 of the packed update.
+            sha256 of the packed update. The result is cached until the
+            next update or clock change.
         """
-        return get_merkle_history(self, update_class=update_class)
+        if self.merkle_cache is not None:
+            ts, cached_class, root, leaf_ids, history = self.merkle_cache
+            if ts == self.clock.read() and cached_class is update_class:
+                return [root, list(leaf_ids), dict(history)]
+
+        root, leaf_ids, history = get_merkle_history(self, update_class=update_class)
+        self.merkle_cache = (self.clock.read(), update_class, root, leaf_ids, history)
+        return [root, list(leaf_ids), dict(history)]
 
     def resolve_merkle_histories(self, history: list[bytes, list[bytes]]) -> list[bytes]:
         """Accept a history of form [root, leaves] from another node.
@@ -243,11 +347,11 @@ class LWWMap:
         """
         tert(isinstance(name, Hashable),
             'name must be a Hashable')
-        tert(isinstance(name, SerializableType),
+        tert(is_serializable(name),
             f'name must be a SerializableType ({SerializableType})')
-        tert(isinstance(value, SerializableType),
+        tert(is_serializable(value),
             f'value must be a SerializableType ({SerializableType})')
-        tert(isinstance(writer, SerializableType),
+        tert(is_serializable(writer),
                f'writer must be a SerializableType ({SerializableType})')
 
         state_update = update_class(
@@ -255,7 +359,7 @@ class LWWMap:
             ts=self.clock.read(),
             data=('o', name, writer, value)
         )
-        self.update(state_update)
+        self._apply(state_update)
 
         return state_update
 
@@ -266,9 +370,9 @@ class LWWMap:
         """
         tert(isinstance(name, Hashable),
             'name must be a Hashable')
-        tert(isinstance(name, SerializableType),
+        tert(is_serializable(name),
             f'name must be a SerializableType ({SerializableType})')
-        tert(isinstance(writer, SerializableType),
+        tert(is_serializable(writer),
                f'writer must be a SerializableType ({SerializableType})')
 
         state_update = update_class(
@@ -276,7 +380,7 @@ class LWWMap:
             ts=self.clock.read(),
             data=('r', name, writer, None)
         )
-        self.update(state_update)
+        self._apply(state_update)
 
         return state_update
 
@@ -294,3 +398,115 @@ class LWWMap:
         """Invokes all event listeners, passing them the state_update."""
         for listener in self.listeners:
             listener(state_update)
+
+
+def _iter_packed_items(data: memoryview) -> Generator[memoryview, None, None]:
+    """Yields a view of each packify-serialized item (a 1-byte code and
+        a 4-byte length followed by the payload) in data without
+        copying or deserializing it. Raises ValueError if an item is
+        truncated.
+    """
+    offset = 0
+    unpack_header = _ITEM_HEADER.unpack_from
+    while offset < len(data):
+        vert(offset + 5 <= len(data), 'packed item header is truncated')
+        _, item_len = unpack_header(data, offset)
+        vert(offset + 5 + item_len <= len(data), 'packed item is truncated')
+        yield data[offset:offset+5+item_len]
+        offset += 5 + item_len
+
+def _packed_payload(item: memoryview, code: bytes) -> memoryview:
+    """Returns the payload of a packify-serialized item after checking
+        its type code and that its declared length covers exactly the
+        rest of the item. Raises ValueError otherwise.
+    """
+    vert(len(item) >= 5 and item[:1] == code,
+        'data must be a packed LWWMap')
+    _, item_len = _ITEM_HEADER.unpack_from(item)
+    vert(5 + item_len == len(item),
+        'packed item length does not match the data')
+    return item[5:]
+
+
+class LWWMapView:
+    """Read-only view of a packed LWWMap. Indexes into the packed bytes
+        and unpacks the LWWRegister for a name only when it is accessed.
+    """
+    clock: ClockProtocol
+    names: ORSet
+    registers: dict[SerializableType, memoryview]
+    _inject: dict
+    _data: memoryview
+
+    def __init__(self, data: bytes, /, *, inject: dict = {}) -> None:
+        """Index the data produced by LWWMap.pack. Only the clock, the
+            names ORSet, and the register names are unpacked. Raises
+            TypeError or ValueError for invalid data.
+        """
+        tert(type(data) in (bytes, bytearray), 'data must be bytes or bytearray')
+
+        self._inject = _unpack_dependencies(_UNPACK_DEPENDENCIES, inject)
+        self._data = memoryview(data)
+        items = list(_iter_packed_items(_packed_payload(self._data, b'l')))
+        vert(len(items) == 3, 'data must be a packed LWWMap')
+        clock, names, registers = items
+
+        self.clock = unpack(bytes(clock), inject=self._inject)
+        self.names = unpack(bytes(names), inject=self._inject)
+        self.registers = {}
+
+        for pair in _iter_packed_items(_packed_payload(registers, b'd')):
+            pair = list(_iter_packed_items(_packed_payload(pair, b't')))
+            vert(len(pair) == 2, 'data must be a packed LWWMap')
+            name, register = pair
+            self.registers[unpack(bytes(name), inject=self._inject)] = register
+
+    def __contains__(self, name: SerializableType) -> bool:
+        return name in self.names.read() and name in self.registers
+
+    def __getitem__(self, name: SerializableType) -> SerializableType:
+        if name not in self:
+            raise KeyError(name)
+        return self.register(name).read(inject=self._inject)
+
+    def __iter__(self) -> Generator[SerializableType, None, None]:
+        for name in self.names.read():
+            if name in self.registers:
+                yield name
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def register(self, name: SerializableType) -> LWWRegister:
+        """Unpack and return the LWWRegister for name. Raises KeyError
+            if there is no register for name.
+        """
+        return unpack(bytes(self.registers[name]), inject=self._inject)
+
+    def read(self) -> dict:
+        """Return the eventually consistent data view, unpacking every
+            register.
+        """
+        return {
+            name: self[name]
+            for name in self
+        }
+
+
+# built once so that unpacking does not copy the module globals each call
+_UNPACK_DEPENDENCIES = {
+    cls.__name__: cls
+    for cls in (
+        BytesWrapper,
+        StrWrapper,
+        IntWrapper,
+        DecimalWrapper,
+        CTDataWrapper,
+        NoneWrapper,
+        LWWMap,
+        LWWRegister,
+        ORSet,
+        ScalarClock,
+        StateUpdate,
+    )
+}
@@ -7,28 +7,61 @@ from .datawrappers import (
     NoneWrapper,
     RGAItemWrapper,
     StrWrapper,
+    _SCALAR_WRAPPERS,
 )
 from .errors import tert, vert
 from .interfaces import (
     ClockProtocol,
     StateUpdateProtocol,
+    fast_isinstance,
+    fast_pack,
+    is_serializable,
+    _IMMUTABLE_TYPES,
+    _ITEM_HEADER,
+    _SERIALIZABLE_TYPE,
+    _unpack_dependencies,
 )
 from .merkle import get_merkle_history, resolve_merkle_histories
 from .scalarclock import ScalarClock
 from .stateupdate import StateUpdate
-from binascii import crc32
-from packify import SerializableType, pack, unpack
-from typing import Any, Callable, Type
+from packify import SerializableType, unpack
+from types import NoneType
+from typing import Any, Callable, Optional, Type
+from zlib import crc32
+
+
+# largest int that packify can pack (ints are packed as unsigned 32-bit)
+_MAX_PACKED_INT = 2**32 - 1
+
+# same-typed values of these types are compared without packing
+_DIRECT_ORDER = frozenset([
+    bytes, int, str, BytesWrapper, DecimalWrapper, IntWrapper, StrWrapper
+])
+
+# range of IntWrapper values (packed as signed 32-bit)
+_MIN_INT32 = -2**31
+_MAX_INT32 = 2**31 - 1
+
+# packing these is about as cheap as a cache lookup, so their packed
+# bytes and checksums are computed on demand instead of being kept
+_UNCACHED_TYPES = frozenset([float, int, NoneType])
 
 
 class LWWRegister:
     """Implements the Last Writer Wins Register CRDT."""
+    __slots__ = (
+        'name', 'value', 'clock', 'last_update', 'last_writer', 'listeners',
+        'packed_cache', 'checksums_cache', 'merkle_cache',
+    )
     name: SerializableType
     value: SerializableType
     clock: ClockProtocol
     last_update: Any
     last_writer: SerializableType
     listeners: list[Callable]
+    packed_cache: Optional[dict[str, tuple[SerializableType, bytes, Optional[int]]]]
+    checksums_cache: Optional[tuple]
+    merkle_cache: Optional[tuple]
 
     def __init__(self, name: SerializableType,
                  value: SerializableType = None,
@@ -44,12 +77,12 @@ class LWWRegister:
         if last_update is None:
             last_update = clock.default_ts
 
-        tert(isinstance(name, SerializableType), f'name must be {SerializableType}')
-        tert(isinstance(value, SerializableType), f'value must be {SerializableType}')
-        tert(isinstance(clock, ClockProtocol) or clock is None,
+        tert(is_serializable(name), f'name must be {_SERIALIZABLE_TYPE}')
+        tert(is_serializable(value), f'value must be {_SERIALIZABLE_TYPE}')
+        tert(fast_isinstance(clock, ClockProtocol) or clock is None,
              f'clock must be ClockProtocol or None')
-        tert(isinstance(last_writer, SerializableType),
-             f'last_writer must be {SerializableType}')
+        tert(is_serializable(last_writer),
+             f'last_writer must be {_SERIALIZABLE_TYPE}')
         if listeners is None:
             listeners = []
         tert(type(listeners) is list,
@@ -64,18 +97,27 @@ class LWWRegister:
         self.last_update = last_update
         self.last_writer = last_writer
         self.listeners = listeners
+        self.packed_cache = None
+        self.checksums_cache = None
+        self.merkle_cache = None
 
     def pack(self) -> bytes:
         """Pack the data and metadata into a bytes string. Raises
             packify.UsageError on failure.
         """
-        return pack([
-            self.name,
-            self.clock,
-            self.value,
-            self.last_update,
-            self.last_writer
-        ])
+        # same bytes as pack([name, clock, value, last_update,
+        # last_writer]), but only the clock is packed on every call
+        items = (
+            self.packed_field('name'),
+            fast_pack(self.clock),
+            self.packed_field('value'),
+            self.packed_field('last_update'),
+            self.packed_field('last_writer'),
+        )
+        # join the list header with the fields so each field is copied
+        # into the result only once
+        header = _ITEM_HEADER.pack(b'l', sum(map(len, items)))
+        return b''.join((header, *items))
 
     @classmethod
     def unpack(cls, data: bytes, inject: dict = {}) -> LWWRegister:
@@ -83,7 +125,7 @@ class LWWRegister:
             packify.UsageError or ValueError on failure.
         """
         name, clock, value, last_update, last_writer = unpack(
-            data, inject={**globals(), **inject}
+            data, inject=_unpack_dependencies(_UNPACK_DEPENDENCIES, inject)
         )
         return cls(
             name=name,
@@ -95,14 +137,82 @@ class LWWRegister:
 
     def read(self, /, *, inject: dict = {}) -> SerializableType:
         """Return the eventually consistent data view."""
+        cls = type(self.value)
+        if cls in _IMMUTABLE_TYPES:
+            return self.value
+        if cls in _SCALAR_WRAPPERS:
+            return cls(self.value.value)
         return unpack(
-            pack(self.value), inject={**globals(), **inject}
+            self.packed_field('value'),
+            inject=_unpack_dependencies(_UNPACK_DEPENDENCIES, inject)
         )
 
+    def packed_field(self, field: str) -> bytes:
+        """Return pack(getattr(self, field)). Unless the value is a
+            small scalar, the result is cached until the attribute is
+            set to a different object.
+        """
+        return self._cached_field(field)[1]
+
+    def field_checksum(self, field: str) -> int:
+        """Return crc32(self.packed_field(field)). The result is
+            cached for as long as the packed field is cached.
+        """
+        cached = self._cached_field(field)
+        if cached[2] is None:
+            cached = (cached[0], cached[1], crc32(cached[1]))
+            if type(cached[0]) not in _UNCACHED_TYPES:
+                self.packed_cache[field] = cached
+        return cached[2]
+
+    def _cached_field(self, field: str) -> tuple[SerializableType, bytes, Optional[int]]:
+        """Return the (value, packed, crc32 or None) entry for field,
+            building the cache on first use.
+        """
+        value = getattr(self, field)
+        if type(value) in _UNCACHED_TYPES:
+            return (value, fast_pack(value), None)
+
+        cache = self.packed_cache
+        if cache is None:
+            cache = self.packed_cache = {}
+        cached = cache.get(field)
+        if cached is None or cached[0] is not value:
+            cached = (value, fast_pack(value), None)
+            cache[field] = cached
+        return cached
+
     @classmethod
     def compare_values(cls, value1: SerializableType,
                        value2: SerializableType) -> bool:
-        return pack(value1) > pack(value2)
+        """Return True if pack(value1) > pack(value2). Values of the
+            same type are compared without packing where the result is
+            known to be identical.
+        """
+        kind = type(value1)
+        if kind is type(value2):
+            if kind is int and 0 <= value1 <= _MAX_PACKED_INT \
+                    and 0 <= value2 <= _MAX_PACKED_INT:
+                return value1 > value2
+            if kind is bytes:
+                # packed bytes are ordered by length, then content
+                return (len(value1), value1) > (len(value2), value2)
+            if kind is str:
+                return _compare_str(value1, value2)
+            # a packed wrapper is its class name followed by its own
+            # packed value, so same-typed wrappers order by the latter
+            if kind is BytesWrapper:
+                return (len(value1.value), value1.value) > \
+                    (len(value2.value), value2.value)
+            if kind is StrWrapper:
+                return _compare_str(value1.value, value2.value)
+            if kind is DecimalWrapper:
+                return _compare_str(str(value1.value), str(value2.value))
+            if kind is IntWrapper and _MIN_INT32 <= value1.value <= _MAX_INT32 \
+                    and _MIN_INT32 <= value2.value <= _MAX_INT32:
+                # packed as big-endian signed, i.e. two's complement bytes
+                return (value1.value & _MAX_PACKED_INT) > (value2.value & _MAX_PACKED_INT)
+        return fast_pack(value1) > fast_pack(value2)
 
     def update(self, state_update: StateUpdateProtocol, /, *,
                inject: dict = {}) -> LWWRegister:
@@ -110,48 +220,128 @@ class LWWRegister:
             TypeError, ValueError, or UsageError for invalid
             state_update.
         """
-        tert(isinstance(state_update, StateUpdateProtocol),
-            'state_update must be instance implementing StateUpdateProtocol')
-        vert(state_update.clock_uuid == self.clock.uuid,
-            'state_update.clock_uuid must equal CRDT.clock.uuid')
-        tert(type(state_update.data) is tuple,
-            'state_update.data must be tuple of (int, SerializableType)')
-        vert(len(state_update.data) == 2,
-            'state_update.data must be tuple of (int, SerializableType)')
-        tert(isinstance(state_update.data[0], SerializableType),
-            f'state_update.data[0] must be SerializableType ({SerializableType}) writer_id')
-        tert(isinstance(state_update.data[1], SerializableType),
-            'state_update.data[1] must be SerializableType')
-
-        self.invoke_listeners(state_update)
+        self._validate_update(state_update)
+        if self.listeners:
+            self.invoke_listeners(state_update)
 
-        # set the value if the update happens after current state
-        if self.clock.is_later(state_update.ts, self.last_update):
+        # set the value if the update happens after current state; a
+        # single compare call classifies the update as later, earlier,
+        # or concurrent, and earlier updates skip the tie breakers
+        order = self.clock.compare(state_update.ts, self.last_update)
+        if order == 1:
             self.last_update = state_update.ts
             self.last_writer = state_update.data[0]
             self.value = state_update.data[1]
-        elif self.clock.are_concurrent(state_update.ts, self.last_update):
+        elif order == 0:
             # use writer int and value as tie breakers for concurrent updates
-            if (state_update.data[0] > self.last_writer) or (
-                    state_update.data[0] == self.last_writer and
-                    self.compare_values(state_update.data[1], self.value)
-                ):
-                self.last_writer = state_update.data[0]
-                self.value = state_update.data[1]
+            writer, value = state_update.data
+            if self._wins_tie(writer, value, self.last_writer, self.value):
+                self.last_writer = writer
+                self.value = value
 
         self.clock.update(state_update.ts)
 
         return self
 
+    def apply_many(self, state_updates: list[StateUpdateProtocol], /, *,
+                   inject: dict = {}) -> LWWRegister:
+        """Apply a batch of updates and return self (monad pattern).
+            The result is the same as calling update for each of the
+            state_updates in order, but all of them are validated before
+            any is applied, the winner is folded in locals, and the clock
+            is only updated with timestamps not earlier than the winning
+            one. Raises TypeError, ValueError, or UsageError for invalid
+            state_updates.
+        """
+        tert(type(state_updates) in (list, tuple),
+            'state_updates must be list or tuple of StateUpdateProtocol')
+        for state_update in state_updates:
+            self._validate_update(state_update)
+
+        if self.listeners:
+            for state_update in state_updates:
+                self.invoke_listeners(state_update)
+
+        compare = self.clock.compare
+        last_update = self.last_update
+        last_writer = self.last_writer
+        value = self.value
+
+        for state_update in state_updates:
+            order = compare(state_update.ts, last_update)
+            if order == 1:
+                last_update = state_update.ts
+                last_writer, value = state_update.data
+            elif order == 0:
+                writer, new_value = state_update.data
+                if self._wins_tie(writer, new_value, last_writer, value):
+                    last_writer = writer
+                    value = new_value
+
+        self.last_update = last_update
+        self.last_writer = last_writer
+        self.value = value
+
+        # earlier timestamps are dominated by the winning one, so only
+        # the winning and concurrent timestamps need to reach the clock
+        frontier = []
+        for state_update in state_updates:
+            ts = state_update.ts
+            if compare(ts, last_update) != -1 and ts not in frontier:
+                frontier.append(ts)
+        for ts in frontier:
+            self.clock.update(ts)
+
+        return self
+
+    def _validate_update(self, state_update: StateUpdateProtocol) -> None:
+        """Raises TypeError or ValueError for invalid state_update."""
+        tert(fast_isinstance(state_update, StateUpdateProtocol),
+            'state_update must be instance implementing StateUpdateProtocol')
+        vert(state_update.clock_uuid == self.clock.uuid,
+            'state_update.clock_uuid must equal CRDT.clock.uuid')
+        tert(type(state_update.data) is tuple,
+            'state_update.data must be tuple of (int, SerializableType)')
+        vert(len(state_update.data) == 2,
+            'state_update.data must be tuple of (int, SerializableType)')
+        tert(is_serializable(state_update.data[0]),
+            f'state_update.data[0] must be SerializableType ({_SERIALIZABLE_TYPE}) writer_id')
+        tert(is_serializable(state_update.data[1]),
+            'state_update.data[1] must be SerializableType')
+
+    def _wins_tie(self, writer: SerializableType, value: SerializableType,
+                  last_writer: SerializableType,
+                  current: SerializableType) -> bool:
+        """Return True if a concurrent write of value by writer beats
+            the current value written by last_writer.
+        """
+        if writer != last_writer:
+            return writer > last_writer
+        if type(value) is type(current) and type(value) in _DIRECT_ORDER:
+            return self.compare_values(value, current)
+        # reuse the cached packed current value when possible
+        if current is self.value:
+            return fast_pack(value) > self.packed_field('value')
+        return fast_pack(value) > fast_pack(current)
+
     def checksums(self, /, *, from_ts: Any = None, until_ts: Any = None) -> tuple[int]:
         """Returns any checksums for the underlying data to detect
-            desynchronization due to message failure.
+            desynchronization due to message failure. The result is
+            reused until the register changes.
         """
-        return (
-            crc32(pack(self.last_update)),
-            crc32(pack(self.last_writer)),
-            crc32(pack(self.value)),
+        last_update, last_writer, value = self.last_update, self.last_writer, self.value
+        cached = self.checksums_cache
+        if cached is not None and cached[0] is last_update and \
+                cached[1] is last_writer and cached[2] is value:
+            return cached[3]
+
+        checksums = (
+            self.field_checksum('last_update'),
+            self.field_checksum('last_writer'),
+            self.field_checksum('value'),
         )
+        self.checksums_cache = (last_update, last_writer, value, checksums)
+        return checksums
 
     def history(self, /, *, from_ts: Any = None, until_ts: Any = None,
                 update_class: Type[StateUpdateProtocol] = StateUpdate
@@ -179,9 +369,20 @@ class LWWRegister:
             [root, [content_id for update in self.history()], {
             content_id: packed for update in self.history()}] where
             packed is the result of update.pack() and content_id is the
-            sha256 of the packed update.
+            sha256 of the packed update. The result is cached until the
+            register changes.
         """
-        return get_merkle_history(self, update_class=update_class)
+        # reuse the last result while none of its inputs have been rebound
+        key = (update_class, self.clock.uuid, self.last_update,
+               self.last_writer, self.value)
+        cached = self.merkle_cache
+        if cached is not None and all([a is b for a, b in zip(cached[0], key)]):
+            _, root, leaf_ids, leaves = cached
+            return [root, list(leaf_ids), dict(leaves)]
+
+        root, leaf_ids, leaves = get_merkle_history(self, update_class=update_class)
+        self.merkle_cache = (key, root, leaf_ids, leaves)
+        return [root, list(leaf_ids), dict(leaves)]
 
     def resolve_merkle_histories(self, history: list[bytes, list[bytes]]) -> list[bytes]:
         """Accept a history of form [root, leaves] from another node.
@@ -199,17 +400,32 @@ class LWWRegister:
             writer id for tie breaking. Raises TypeError for invalid
             value or writer.
         """
-        tert(isinstance(value, SerializableType) or value is None,
+        tert(is_serializable(value) or value is None,
             'value must be a SerializableType or None')
-        tert(isinstance(writer, SerializableType),
-               f'writer must be an SerializableType ({SerializableType})')
+        tert(is_serializable(writer),
+               f'writer must be an SerializableType ({_SERIALIZABLE_TYPE})')
 
+        ts = self.clock.read()
         state_update = update_class(
             clock_uuid=self.clock.uuid,
-            ts=self.clock.read(),
+            ts=ts,
             data=(writer, value)
         )
-        self.update(state_update, inject=inject)
+
+        if self.clock.compare(ts, self.last_update) != 1:
+            # not strictly later (e.g. a custom clock or a register
+            # initialized ahead of its clock), so resolve it normally
+            self.update(state_update, inject=inject)
+            return state_update
+
+        # the update was built locally from validated parts and is later
+        # than the current state, so apply it without re-validating it
+        if self.listeners:
+            self.invoke_listeners(state_update)
+        self.last_update = ts
+        self.last_writer = writer
+        self.value = value
+        self.clock.update(ts)
 
         return state_update
 
@@ -220,10 +436,43 @@ class LWWRegister:
         self.listeners.append(listener)
 
     def remove_listener(self, listener: Callable[[StateUpdateProtocol], None]) -> None:
-        """Removes a listener if it was previously added."""
+        """Removes a listener if it was previously added. This scans
+            the listeners list, so it is linear in the number of
+            listeners; invoking listeners is unaffected.
+        """
         self.listeners.remove(listener)
 
     def invoke_listeners(self, state_update: StateUpdateProtocol) -> None:
         """Invokes all event listeners, passing them the state_update."""
         for listener in self.listeners:
             listener(state_update)
+
+
+def _compare_str(str1: str, str2: str) -> bool:
+    """Return True if str1 encodes to a greater packed value than
+        str2, i.e. a longer utf-8 encoding or an equally long one that
+        is greater bytewise. utf-8 preserves code point order, so ascii
+        strings are compared without encoding them.
+    """
+    if str1.isascii() and str2.isascii():
+        return (len(str1), str1) > (len(str2), str2)
+    str1, str2 = str1.encode('utf-8'), str2.encode('utf-8')
+    return (len(str1), str1) > (len(str2), str2)
+
+
+# built once so that unpacking does not copy the module globals each call
+_UNPACK_DEPENDENCIES = {
+    cls.__name__: cls
+    for cls in (
+        BytesWrapper,
+        CTDataWrapper,
+        DecimalWrapper,
+        IntWrapper,
+        NoneWrapper,
+        RGAItemWrapper,
+        StrWrapper,
+        LWWRegister,
+        ScalarClock,
+        StateUpdate,
+    )
+}
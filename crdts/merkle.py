@@ -1,50 +1,126 @@
 from .errors import tert, vert
 from .interfaces import CRDTProtocol, StateUpdateProtocol
 from .stateupdate import StateUpdate
+from concurrent.futures import Executor
 from hashlib import sha256
-from typing import Type
+from typing import Optional, Type
+import os
 
 
+# minimum number of leaves before hashing is spread across an executor
+PARALLEL_HASH_THRESHOLD = 512
+
+# hashlib only releases the GIL for inputs of at least this many bytes
+HASHLIB_GIL_MINSIZE = 2048
+
+
+def _hash_chunk(leaves: list[bytes]) -> list[bytes]:
+    # content ids are not secrets, so FIPS-restricted OpenSSL builds may
+    # use their unrestricted sha256 implementation
+    return [sha256(leaf, usedforsecurity=False).digest() for leaf in leaves]
+
+def _hash_leaves(leaves: list[bytes],
+                 executor: Optional[Executor] = None) -> list[bytes]:
+    """Return the sha256 digest of each leaf in order. If the caller
+        supplies an executor, large histories of large leaves are hashed
+        in chunks on it since hashlib releases the GIL for them;
+        otherwise hashing is serial.
+    """
+    if executor is None or len(leaves) < PARALLEL_HASH_THRESHOLD or \
+            sum([len(leaf) for leaf in leaves]) < len(leaves) * HASHLIB_GIL_MINSIZE:
+        return _hash_chunk(leaves)
+
+    size = -(-len(leaves) // (os.cpu_count() or 1))
+    chunks = [leaves[i:i+size] for i in range(0, len(leaves), size)]
+    return [
+        leaf_id
+        for leaf_ids in executor.map(_hash_chunk, chunks)
+        for leaf_id in leaf_ids
+    ]
+
+def _cached_leaf_ids(crdt: CRDTProtocol, packed: list[bytes],
+                     executor: Optional[Executor] = None) -> list[bytes]:
+    """Return the sha256 digest of each packed update in order. If the
+        crdt has a leaf_id_cache of {packed update: leaf_id} from the
+        previous call, its digests are reused, so only updates that were
+        not in its last history get hashed. Other CRDTs are hashed in
+        full.
+    """
+    previous = getattr(crdt, 'leaf_id_cache', None)
+    if previous is None:
+        return _hash_leaves(packed, executor)
+
+    missing = [leaf for leaf in packed if leaf not in previous]
+    current = dict(zip(missing, _hash_leaves(missing, executor)))
+    for leaf in packed:
+        if leaf not in current:
+            current[leaf] = previous[leaf]
+
+    crdt.leaf_id_cache = current
+    return [current[leaf] for leaf in packed]
+
+def _merkle_root(leaf_ids: list[bytes]) -> bytes:
+    """Hash the sorted leaf_ids into the Merkle root."""
+    return sha256(b''.join(leaf_ids), usedforsecurity=False).digest()
+
+def _pack_history(crdt: CRDTProtocol,
+                  update_class: Type[StateUpdateProtocol]) -> list[bytes]:
+    """Pack every update in the history of crdt in a single pass. Uses
+        the iter_history generator when the crdt provides one so that
+        the history tuple is never materialized.
+    """
+    history = getattr(crdt, 'iter_history', crdt.history)
+    return [
+        update.pack()
+        for update in history(update_class=update_class)
+    ]
+
 def get_merkle_history(crdt: CRDTProtocol, /, *,
-                        update_class: Type[StateUpdateProtocol] = StateUpdate
+                        update_class: Type[StateUpdateProtocol] = StateUpdate,
+                        executor: Optional[Executor] = None
                         ) -> list[bytes, list[bytes], dict[bytes, bytes]]:
     """Get a Merklized history for the StateUpdates of the form
         [root, [content_id for update in crdt.history()], {
         content_id: packed for update in crdt.history()}] where
         packed is the result of update.pack() and content_id is the
-        sha256 of the packed update.
+        sha256 of the packed update. If an executor is supplied, large
+        histories are hashed in parallel on it.
     """
-    history = crdt.history(update_class=update_class)
-    leaves = [
-        update.pack()
-        for update in history
-    ]
-    leaf_ids = [
-        sha256(leaf).digest()
-        for leaf in leaves
-    ]
-    history = {
-        leaf_id: leaf
-        for leaf_id, leaf in zip(leaf_ids, leaves)
-    }
-    leaf_ids.sort()
-    root = sha256(b''.join(leaf_ids)).digest()
-    return [root, leaf_ids, history]
+    packed = _pack_history(crdt, update_class)
+    leaves = sorted(zip(_cached_leaf_ids(crdt, packed, executor), packed))
+    leaf_ids = [leaf_id for leaf_id, _ in leaves]
+    return [_merkle_root(leaf_ids), leaf_ids, dict(leaves)]
+
+def get_merkle_leaf_ids(crdt: CRDTProtocol, /, *,
+                        update_class: Type[StateUpdateProtocol] = StateUpdate,
+                        executor: Optional[Executor] = None
+                        ) -> list[bytes, frozenset[bytes]]:
+    """Get only the root and the set of leaf content_ids of the
+        Merklized history, i.e. [root, frozenset(content_ids)], without
+        building the {content_id: packed} dict. If an executor is
+        supplied, large histories are hashed in parallel on it.
+    """
+    leaf_ids = sorted(_cached_leaf_ids(
+        crdt, _pack_history(crdt, update_class), executor
+    ))
+    return [_merkle_root(leaf_ids), frozenset(leaf_ids)]
 
 def resolve_merkle_histories(crdt: CRDTProtocol, history: list[bytes, list[bytes]]) -> list[bytes]:
     """Accept a history of form [root, leaves] from another node.
         Return the leaves that need to be resolved and merged for
-        synchronization. Raises TypeError or ValueError for invalid
-        input.
+        synchronization. Uses crdt.get_merkle_history so that any
+        history the crdt has cached is reused. Raises TypeError or
+        ValueError for invalid input.
     """
     tert(type(history) in (list, tuple), 'history must be [[bytes, ], bytes]')
     vert(len(history) >= 2, 'history must be [[bytes, ], bytes]')
     tert(all([type(leaf) is bytes for leaf in history[1]]),
             'history must be [[bytes, ], bytes]')
-    local_history = get_merkle_history(crdt)
-    if local_history[0] == history[0]:
+    root, local_leaf_ids, _ = crdt.get_merkle_history()
+    if root == history[0]:
         return []
+    local_leaf_ids = set(local_leaf_ids)
     return [
         leaf for leaf in history[1]
-        if leaf not in local_history[1]
+        if leaf not in local_leaf_ids
     ]
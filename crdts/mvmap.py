@@ -8,25 +8,44 @@ from .datawrappers import (
     NoneWrapper,
 )
 from .errors import tressa, tert, vert
-from .interfaces import ClockProtocol, StateUpdateProtocol
+from .interfaces import (
+    ClockProtocol,
+    StateUpdateProtocol,
+    fast_isinstance,
+    fast_pack,
+    is_serializable,
+    _ITEM_HEADER,
+    _SERIALIZABLE_TYPE,
+    _unpack_dependencies,
+)
 from .merkle import get_merkle_history, resolve_merkle_histories
 from .mvregister import MVRegister
 from .orset import ORSet
 from .scalarclock import ScalarClock
 from .stateupdate import StateUpdate
-from binascii import crc32
-from packify import pack, unpack, SerializableType
+from packify import unpack, SerializableType
 from typing import Any, Callable, Type
+from zlib import crc32
+
+
+# NoneWrapper equality depends only on type, so one instance is shared
+_NONE_WRAPPER = NoneWrapper()
 
 
 class MVMap:
     """Implements a Map CRDT using Multi-Value Registers.
         https://concordant.gitlabpages.inria.fr/software/c-crdtlib/c-crdtlib/crdtlib.crdt/-m-v-map/index.html
     """
+    __slots__ = (
+        'names', 'registers', 'clock', 'listeners', 'checksum_cache',
+        'leaf_id_cache',
+    )
     names: ORSet
     registers: dict[SerializableType, MVRegister]
     clock: ClockProtocol
     listeners: list[Callable]
+    checksum_cache: dict[SerializableType, tuple]
+    leaf_id_cache: dict[bytes, bytes]
 
     def __init__(self, names: ORSet = None, registers: dict = None,
                 clock: ClockProtocol = None, listeners: list[Callable] = None
@@ -39,7 +58,7 @@ class MVMap:
             'names must be an ORSet or None')
         tert(type(registers) is dict or registers is None,
             'registers must be a dict mapping names to MVRegisters or None')
-        tert(isinstance(clock, ClockProtocol) or clock is None,
+        tert(fast_isinstance(clock, ClockProtocol) or clock is None,
             'clock must be a ClockProtocol or None')
         if listeners is None:
             listeners = []
@@ -55,89 +74,118 @@ class MVMap:
 
         names.clock = clock
 
-        for name in registers:
-            tressa(name in names.observed or name in names.removed,
-                'each register name must be in the names ORSet')
-            tert(type(registers[name]) is MVRegister,
-                'each element of registers must be an MVRegister')
-            registers[name].clock = clock
+        # validate every register before any of their clocks is replaced
+        observed, removed = names.observed, names.removed
+        tressa(all(name in observed or name in removed for name in registers),
+            'each register name must be in the names ORSet')
+        tert(all(type(register) is MVRegister for register in registers.values()),
+            'each element of registers must be an MVRegister')
+        for register in registers.values():
+            register.clock = clock
 
         self.names = names
         self.registers = registers
         self.clock = clock
         self.listeners = listeners
+        self.checksum_cache = {}
+        self.leaf_id_cache = {}
 
     def pack(self) -> bytes:
         """Pack the data and metadata into a bytes string. Raises
             packify.UsageError on failure.
         """
-        return pack([
-            self.clock,
-            self.names,
-            self.registers
-        ])
+        # same bytes as pack([clock, names, registers]): packify packs a
+        # dict as the sorted packed (name, register) tuples; each pair is
+        # framed here with fast_pack to skip packify's per-item checks
+        pairs = []
+        append = pairs.append
+        header = _ITEM_HEADER.pack
+        for name, register in self.registers.items():
+            packed_name, packed_register = fast_pack(name), fast_pack(register)
+            append(b''.join((
+                header(b't', len(packed_name) + len(packed_register)),
+                packed_name, packed_register,
+            )))
+        registers = b''.join(sorted(pairs))
+
+        items = (
+            fast_pack(self.clock),
+            fast_pack(self.names),
+            header(b'd', len(registers)),
+            registers,
+        )
+        return b''.join((header(b'l', sum(map(len, items))), *items))
 
     @classmethod
     def unpack(cls, data: bytes, inject: dict = {}) -> MVMap:
         """Unpack the data bytes string into an instance. Raises
             packify.UsageError or ValueError on failure.
         """
-        dependencies = {**globals(), **inject}
-        clock, names, registers = unpack(data, inject=dependencies)
+        clock, names, registers = unpack(
+            data, inject=_unpack_dependencies(_UNPACK_DEPENDENCIES, inject)
+        )
         return cls(names, registers, clock)
 
     def read(self) -> dict:
         """Return the eventually consistent data view."""
-        result = {}
-
-        for name in self.names.read():
-            result[name] = self.registers[name].read()
-
-        return result
+        # names.read() is computed once and cached by the ORSet
+        registers = self.registers
+        return {name: registers[name].read() for name in self.names.read()}
 
     def update(self, state_update: StateUpdateProtocol) -> MVMap:
         """Apply an update and return self (monad pattern). Raises
             TypeError or ValueError for invalid state_update.clock_uuid
             or state_update.data.
         """
-        tert(isinstance(state_update, StateUpdateProtocol),
+        tert(fast_isinstance(state_update, StateUpdateProtocol),
             'state_update must be instance implementing StateUpdateProtocol')
         vert(state_update.clock_uuid == self.clock.uuid,
             'state_update.clock_uuid must equal CRDT.clock.uuid')
         tert(type(state_update.data) is tuple,
-            f'state_update.data must be tuple of (str, SerializableType ({SerializableType}), SerializableType ({SerializableType}))')
+            f'state_update.data must be tuple of (str, SerializableType ({_SERIALIZABLE_TYPE}), SerializableType ({_SERIALIZABLE_TYPE}))')
         vert(len(state_update.data) == 3,
-            f'state_update.data must be tuple of (str, SerializableType ({SerializableType}), SerializableType ({SerializableType}))')
+            f'state_update.data must be tuple of (str, SerializableType ({_SERIALIZABLE_TYPE}), SerializableType ({_SERIALIZABLE_TYPE}))')
 
         op, name, value = state_update.data
         vert(op in ('o', 'r'),
             'state_update.data[0] must be str op one of (\'o\', \'r\')')
-        tert(isinstance(name, SerializableType),
-            f'state_update.data[1] must be SerializableType ({SerializableType}) name')
-        tert(isinstance(value, SerializableType),
-            f'state_update.data[2] must be SerializableType ({SerializableType}) value')
+        tert(is_serializable(name),
+            f'state_update.data[1] must be SerializableType ({_SERIALIZABLE_TYPE}) name')
+        tert(is_serializable(value),
+            f'state_update.data[2] must be SerializableType ({_SERIALIZABLE_TYPE}) value')
+
+        return self._apply(state_update)
 
+    def _apply(self, state_update: StateUpdateProtocol) -> MVMap:
+        """Apply an already validated update and return self. Used by
+            set and unset to skip re-validating the updates they build.
+        """
         self.invoke_listeners(state_update)
+        op, name, value = state_update.data
         ts = state_update.ts
 
         if op == 'o':
             # try to add to the names ORSet
             self.names.update(StateUpdate(self.clock.uuid, ts, ('o', name)))
 
-            # if register missing and name added successfully, create register
-            if name not in self.registers and name in self.names.read():
+            # if register missing and name added successfully, create register;
+            # ORSet keeps observed and removed disjoint, so a member of
+            # observed is in names.read() and this avoids materializing it
+            if name not in self.registers and name in self.names.observed:
                 self.registers[name] = MVRegister(name, [value], self.clock, ts)
 
         if op == 'r':
             # try to remove from the names ORSet
             self.names.update(StateUpdate(self.clock.uuid, ts, ('r', name)))
 
-            if name not in self.names.read() and name in self.registers:
+            if name not in self.names.observed and name in self.registers:
                 del self.registers[name]
+                self.checksum_cache.pop(name, None)
 
-        # if the register exists, update it
+        # if the register exists, update it; the map has already checked
+        # everything the register would validate
         if name in self.registers:
-            self.registers[name].update(StateUpdate(self.clock.uuid, ts, value))
+            self.registers[name]._apply(StateUpdate(self.clock.uuid, ts, value))
 
         return self
 
@@ -148,20 +196,41 @@ class MVMap:
         names_checksums = self.names.checksums(from_ts=from_ts, until_ts=until_ts)
         total_last_update = 0
         total_register_crc32 = 0
-
-        for name in self.registers:
-            ts = self.registers[name].last_update
-            if from_ts is not None:
-                if self.clock.is_later(from_ts, ts):
-                    continue
-            if until_ts is not None:
-                if self.clock.is_later(ts, until_ts):
-                    continue
-
-            packed = pack(self.registers[name].name)
-            packed += pack([v for v in self.registers[name].values])
-            total_register_crc32 += crc32(packed)
-            total_last_update += crc32(pack(self.registers[name].last_update))
+        cache = self.checksum_cache
+
+        # filter by the ts window up front, and only when one is given
+        registers = self.registers.items()
+        if from_ts is not None or until_ts is not None:
+            is_later = self.clock.is_later
+            registers = [
+                (name, register) for name, register in registers
+                if (from_ts is None or not is_later(from_ts, register.last_update))
+                and (until_ts is None or not is_later(register.last_update, until_ts))
+            ]
+
+        for name, register in registers:
+            ts = register.last_update
+
+            # a register's values list is replaced whenever an update
+            # changes it, so the cached crcs are current while list,
+            # length, and ts match
+            values = register.values
+            cached = cache.get(name)
+            if cached is None or cached[0] is not values or \
+                    cached[1] != len(values) or cached[2] is not ts:
+                # crc32(pack(name) + pack(values)) in one pass, where
+                # pack(values) is the list header and the packed values
+                packed_values = register.packed_values()
+                crc = crc32(b''.join((
+                    fast_pack(name),
+                    _ITEM_HEADER.pack(b'l', sum(map(len, packed_values))),
+                    *packed_values,
+                )))
+                cached = (values, len(values), ts, crc32(fast_pack(ts)), crc)
+                cache[name] = cached
+
+            total_last_update += cached[3]
+            total_register_crc32 += cached[4]
 
         return (
             total_last_update % 2**32,
@@ -175,36 +244,41 @@ class MVMap:
             converge to the underlying data. Useful for
             resynchronization by replaying updates from divergent nodes.
         """
-        registers_history: dict[SerializableType, tuple[StateUpdateProtocol]] = {}
         orset_history = self.names.history(
             from_ts=from_ts,
             until_ts=until_ts,
             update_class=update_class,
         )
-        history = []
-
-        for name in self.registers:
-            registers_history[name] = self.registers[name].history(
+        # only the registers named in the ORSet history are needed
+        registers = self.registers
+        registers_history: dict[SerializableType, tuple[StateUpdateProtocol]] = {
+            name: registers[name].history(
                 from_ts=from_ts,
                 until_ts=until_ts,
                 update_class=update_class,
             )
+            for name in {update.data[1] for update in orset_history}
+            if name in registers
+        }
+        history = []
 
         for update in orset_history:
-            name = update.data[1]
+            op, name = update.data
             if name in registers_history:
+                if not registers_history[name]:
+                    # the register state falls outside of the ts window
+                    continue
                 register_update = registers_history[name][0]
-                update_class = register_update.__class__
                 history.append(update_class(
                     clock_uuid=update.clock_uuid,
                     ts=register_update.ts,
-                    data=(update.data[0], name, register_update.data)
+                    data=(op, name, register_update.data)
                 ))
             else:
                 history.append(update_class(
                     clock_uuid=update.clock_uuid,
                     ts=update.ts,
-                    data=(update.data[0], name, NoneWrapper())
+                    data=(op, name, _NONE_WRAPPER)
                 ))
 
         return tuple(history)
@@ -234,17 +308,17 @@ class MVMap:
             (StateUpdate by default) that should be propagated to all
             nodes. Raises TypeError for invalid name or value.
         """
-        tert(isinstance(name, SerializableType),
-            f'name must be a SerializableType ({SerializableType})')
-        tert(isinstance(value, SerializableType),
-            f'value must be a SerializableType ({SerializableType}) or None')
+        tert(is_serializable(name),
+            f'name must be a SerializableType ({_SERIALIZABLE_TYPE})')
+        tert(is_serializable(value),
+            f'value must be a SerializableType ({_SERIALIZABLE_TYPE}) or None')
 
         state_update = update_class(
             clock_uuid=self.clock.uuid,
             ts=self.clock.read(),
             data=('o', name, value)
         )
-        self.update(state_update)
+        self._apply(state_update)
 
         return state_update
 
@@ -253,15 +327,15 @@ class MVMap:
         """Removes the key name from the dict. Returns a StateUpdate.
             Raises TypeError for invalid name.
         """
-        tert(isinstance(name, SerializableType),
-            f'name must be a SerializableType ({SerializableType})')
+        tert(is_serializable(name),
+            f'name must be a SerializableType ({_SERIALIZABLE_TYPE})')
 
         state_update = update_class(
             clock_uuid=self.clock.uuid,
             ts=self.clock.read(),
-            data=('r', name, NoneWrapper())
+            data=('r', name, _NONE_WRAPPER)
         )
-        self.update(state_update)
+        self._apply(state_update)
 
         return state_update
 
@@ -279,3 +353,22 @@ class MVMap:
         """Invokes all event listeners, passing them the state_update."""
         for listener in self.listeners:
             listener(state_update)
+
+
+# built once so that unpacking does not copy the module globals each call
+_UNPACK_DEPENDENCIES = {
+    cls.__name__: cls
+    for cls in (
+        BytesWrapper,
+        CTDataWrapper,
+        DecimalWrapper,
+        IntWrapper,
+        NoneWrapper,
+        StrWrapper,
+        MVMap,
+        MVRegister,
+        ORSet,
+        ScalarClock,
+        StateUpdate,
+    )
+}
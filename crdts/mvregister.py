@@ -7,30 +7,46 @@ from .datawrappers import (
     NoneWrapper,
     RGAItemWrapper,
     StrWrapper,
+    _SCALAR_WRAPPERS,
 )
 from .errors import tert, vert
 from .interfaces import (
     ClockProtocol,
     StateUpdateProtocol,
+    fast_isinstance,
+    fast_pack,
+    is_serializable,
+    _IMMUTABLE_TYPES,
+    _ITEM_HEADER,
+    _SERIALIZABLE_TYPE,
+    _unpack_dependencies,
 )
 from .merkle import get_merkle_history, resolve_merkle_histories
 from .scalarclock import ScalarClock
 from .stateupdate import StateUpdate
-from binascii import crc32
-from packify import SerializableType, pack, unpack
-from typing import Any, Callable, Type
+from bisect import bisect_left
+from packify import SerializableType, unpack
+from typing import Any, Callable, Optional, Type
+from zlib import crc32
 
 
 class MVRegister:
     """Implements the Multi-Value Register CRDT."""
+    __slots__ = (
+        'name', 'values', 'clock', 'last_update', 'listeners', 'packed_cache',
+        'checksums_cache', 'merkle_cache',
+    )
     name: SerializableType
     values: list[SerializableType]
     clock: ClockProtocol
     last_update: Any
     listeners: list[Callable]
+    packed_cache: Optional[tuple[list, int, list[bytes], bool]]
+    checksums_cache: Optional[tuple]
+    merkle_cache: Optional[tuple]
 
     def __init__(self, name: SerializableType,
-                 values: list[SerializableType] = [],
+                 values: list[SerializableType] = None,
                  clock: ClockProtocol = None,
                  last_update: Any = None,
                  listeners: list[Callable] = None) -> None:
@@ -38,16 +54,18 @@ class MVRegister:
             and last_update (all but the first are optional). Raises
             TypeError for invalid name, values, or clock.
         """
+        if values is None:
+            values = []
         if clock is None:
             clock = ScalarClock()
         if last_update is None:
             last_update = clock.default_ts
 
-        tert(isinstance(name, SerializableType), f'name must be {SerializableType}')
-        tert(isinstance(values, list), f'values must be list[{SerializableType}]')
-        tert(isinstance(clock, ClockProtocol), 'clock must be ClockProtocol or None')
-        tert(all([isinstance(v, SerializableType) for v in values]),
-             f'values must be list[{SerializableType}]')
+        tert(is_serializable(name), f'name must be {_SERIALIZABLE_TYPE}')
+        tert(isinstance(values, list), f'values must be list[{_SERIALIZABLE_TYPE}]')
+        tert(fast_isinstance(clock, ClockProtocol), 'clock must be ClockProtocol or None')
+        tert(all(map(is_serializable, values)),
+             f'values must be list[{_SERIALIZABLE_TYPE}]')
         if listeners is None:
             listeners = []
         tert(type(listeners) is list,
@@ -61,17 +79,26 @@ class MVRegister:
         self.clock = clock
         self.last_update = last_update
         self.listeners = listeners
+        self.packed_cache = None
+        self.checksums_cache = None
+        self.merkle_cache = None
 
     def pack(self) -> bytes:
         """Pack the data and metadata into a bytes string. Raises
             packify.UsageError on failure.
         """
-        return pack([
-            self.name,
-            self.clock,
-            self.last_update,
-            self.values
-        ])
+        # same bytes as pack([name, clock, last_update, values]), but the
+        # values list is framed from the cached packed values
+        packed_values = self.packed_values()
+        items = (
+            fast_pack(self.name),
+            fast_pack(self.clock),
+            fast_pack(self.last_update),
+            _ITEM_HEADER.pack(b'l', sum(map(len, packed_values))),
+            *packed_values,
+        )
+        header = _ITEM_HEADER.pack(b'l', sum(map(len, items)))
+        return b''.join((header, *items))
 
     @classmethod
     def unpack(cls, data: bytes, inject: dict = {}) -> MVRegister:
@@ -79,49 +106,99 @@ class MVRegister:
             packify.UsageError or ValueError on failure.
         """
         name, clock, last_update, values = unpack(
-            data, inject={**globals(), **inject}
+            data, inject=_unpack_dependencies(_UNPACK_DEPENDENCIES, inject)
         )
         return cls(name, values, clock, last_update)
 
     def read(self, inject: dict = {}) -> tuple[SerializableType]:
         """Return the eventually consistent data view."""
-        return tuple([
-            unpack(
-                pack(value), inject={**globals(), **inject}
-            )
-            for value in self.values
-        ])
+        result = []
+        dependencies = _unpack_dependencies(_UNPACK_DEPENDENCIES, inject)
+        for value, packed in zip(self.values, self.packed_values()):
+            cls = type(value)
+            if cls in _IMMUTABLE_TYPES:
+                result.append(value)
+            elif cls in _SCALAR_WRAPPERS:
+                result.append(cls(value.value))
+            else:
+                result.append(unpack(packed, inject=dependencies))
+        return tuple(result)
+
+    def packed_values(self) -> list[bytes]:
+        """Return [pack(v) for v in self.values]. The result is cached
+            until self.values is replaced or changes length.
+        """
+        values = self.values
+        cached = self.packed_cache
+        if cached is None or cached[0] is not values or cached[1] != len(values):
+            # values passed to __init__ or assigned are not known to be sorted
+            cached = (values, len(values), [fast_pack(v) for v in values], False)
+            self.packed_cache = cached
+        return cached[2]
 
     @classmethod
     def compare_values(cls, value1: SerializableType,
                        value2: SerializableType) -> bool:
         """Return True if value1 is greater than value2, else False."""
-        return pack(value1) > pack(value2)
+        return fast_pack(value1) > fast_pack(value2)
 
     def update(self, state_update: StateUpdateProtocol) -> MVRegister:
         """Apply an update and return self (monad pattern). Raises
             TypeError or ValueError for invalid state_update,
             state_update.clock_uuid, or state_update.data.
         """
-        tert(isinstance(state_update, StateUpdateProtocol),
+        tert(fast_isinstance(state_update, StateUpdateProtocol),
             'state_update must be instance implementing StateUpdateProtocol')
         vert(state_update.clock_uuid == self.clock.uuid,
             'state_update.clock_uuid must equal CRDT.clock.uuid')
-        tert(isinstance(state_update.data, SerializableType),
-            f'state_update.data must be SerializableType ({SerializableType})')
+        tert(is_serializable(state_update.data),
+            f'state_update.data must be SerializableType ({_SERIALIZABLE_TYPE})')
+
+        return self._apply(state_update)
 
+    def _apply(self, state_update: StateUpdateProtocol) -> MVRegister:
+        """Apply an already validated update and return self. Used by
+            MVMap to skip re-validating the register updates it builds.
+        """
         self.invoke_listeners(state_update)
 
+        # classify the update against the current state with one clock call
+        order = self.clock.compare(state_update.ts, self.last_update)
+
         # set the value if the update happens after current state
-        if self.clock.is_later(state_update.ts, self.last_update):
+        if order == 1:
             self.last_update = state_update.ts
             self.values = [state_update.data]
+        elif order == 0:
+            # preserve all concurrent updates; values are kept sorted by
+            # their packed bytes, so a bisect both finds a duplicate and
+            # gives the position at which to insert a new value. The lists
+            # are rebuilt rather than changed in place so that caches keyed
+            # on the identity of self.values (e.g. in MVMap) see the change.
+            values = self.values
+            packed_values = self.packed_values()
+            packed = fast_pack(state_update.data)
+            checksums = self._cached_checksums()
+            if not self.packed_cache[3]:
+                positions = sorted(range(len(values)), key=packed_values.__getitem__)
+                values = [values[i] for i in positions]
+                packed_values = [packed_values[i] for i in positions]
+
+            index = bisect_left(packed_values, packed)
+            if index == len(packed_values) or packed_values[index] != packed:
+                values = [*values[:index], state_update.data, *values[index:]]
+                packed_values = [*packed_values[:index], packed, *packed_values[index:]]
 
-        if self.clock.are_concurrent(state_update.ts, self.last_update):
-            # preserve all concurrent updates
-            if state_update.data not in self.values:
-                self.values.append(state_update.data)
-                self.values.sort(key=lambda item: pack(item))
+                # the values checksum is a sum, so add the new value's crc
+                # to the running total instead of recomputing it later
+                if checksums is not None:
+                    checksums = (checksums[0], (checksums[1] + crc32(packed)) % 2**32)
+
+            if values is not self.values:
+                self.values = values
+                self.packed_cache = (values, len(values), packed_values, True)
+                if checksums is not None:
+                    self.checksums_cache = (values, len(values), self.last_update, checksums)
 
         self.clock.update(state_update.ts)
 
@@ -129,12 +206,29 @@ class MVRegister:
 
     def checksums(self, /, *, from_ts: Any = None, until_ts: Any = None) -> tuple[int]:
         """Returns any checksums for the underlying data to detect
-            desynchronization due to message failure.
+            desynchronization due to message failure. The result is
+            reused until the register changes.
         """
-        return (
-            crc32(pack(self.last_update)),
-            sum([crc32(pack(v)) for v in self.values]) % 2**32,
-        )
+        checksums = self._cached_checksums()
+        if checksums is None:
+            checksums = (
+                crc32(fast_pack(self.last_update)),
+                sum(map(crc32, self.packed_values())) % 2**32,
+            )
+            self.checksums_cache = (
+                self.values, len(self.values), self.last_update, checksums
+            )
+        return checksums
+
+    def _cached_checksums(self) -> tuple[int]|None:
+        """Return the cached checksums if values and last_update have
+            not changed since they were computed, else None.
+        """
+        cached = self.checksums_cache
+        if cached is not None and cached[0] is self.values and \
+                cached[1] == len(self.values) and cached[2] is self.last_update:
+            return cached[3]
+        return None
 
     def history(self, /, *, from_ts: Any = None, until_ts: Any = None,
                 update_class: Type[StateUpdateProtocol] = StateUpdate
@@ -149,8 +243,15 @@ class MVRegister:
         if until_ts is not None and self.clock.is_later(self.last_update, until_ts):
             return tuple()
 
+        clock_uuid, ts = self.clock.uuid, self.last_update
+        if len(self.values) == 1:
+            # concurrent values are rare, so most registers hold just one
+            return (update_class(
+                clock_uuid=clock_uuid, ts=ts, data=self.values[0]
+            ),)
+
         return tuple([
-            update_class(clock_uuid=self.clock.uuid, ts=self.last_update, data=v)
+            update_class(clock_uuid=clock_uuid, ts=ts, data=v)
             for v in self.values
         ])
 
@@ -161,9 +262,21 @@ class MVRegister:
             [root, [content_id for update in self.history()], {
             content_id: packed for update in self.history()}] where
             packed is the result of update.pack() and content_id is the
-            sha256 of the packed update.
+            sha256 of the packed update. The result is cached until the
+            register changes.
         """
-        return get_merkle_history(self, update_class=update_class)
+        # reuse the last result while none of its inputs have been
+        # rebound; the length of values is checked in case it was mutated
+        key = (update_class, self.clock.uuid, self.last_update, self.values)
+        cached = self.merkle_cache
+        if cached is not None and cached[1] == len(self.values) and \
+                all([a is b for a, b in zip(cached[0], key)]):
+            _, _, root, leaf_ids, leaves = cached
+            return [root, list(leaf_ids), dict(leaves)]
+
+        root, leaf_ids, leaves = get_merkle_history(self, update_class=update_class)
+        self.merkle_cache = (key, len(self.values), root, leaf_ids, leaves)
+        return [root, list(leaf_ids), dict(leaves)]
 
     def resolve_merkle_histories(self, history: list[bytes, list[bytes]]
                                  ) -> list[bytes]:
@@ -181,8 +294,8 @@ class MVRegister:
             update_class (StateUpdate by default). Raises TypeError for
             invalid value.
         """
-        tert(isinstance(value, SerializableType),
-            f'value must be SerializableType ({SerializableType})')
+        tert(is_serializable(value),
+            f'value must be SerializableType ({_SERIALIZABLE_TYPE})')
 
         state_update = update_class(
             clock_uuid=self.clock.uuid,
@@ -207,3 +320,21 @@ class MVRegister:
         """Invokes all event listeners, passing them the state_update."""
         for listener in self.listeners:
             listener(state_update)
+
+
+# built once so that unpacking does not copy the module globals each call
+_UNPACK_DEPENDENCIES = {
+    cls.__name__: cls
+    for cls in (
+        BytesWrapper,
+        CTDataWrapper,
+        DecimalWrapper,
+        IntWrapper,
+        NoneWrapper,
+        RGAItemWrapper,
+        StrWrapper,
+        MVRegister,
+        ScalarClock,
+        StateUpdate,
+    )
+}
@@ -1,13 +1,13 @@
 from __future__ import annotations
 from .errors import tert, vert
-from .interfaces import ClockProtocol, StateUpdateProtocol
+from .interfaces import ClockProtocol, StateUpdateProtocol, fast_isinstance
 from .merkle import get_merkle_history, resolve_merkle_histories
 from .scalarclock import ScalarClock
 from .stateupdate import StateUpdate
-from binascii import crc32
 from dataclasses import dataclass, field
 from packify import pack, unpack
 from typing import Any, Callable, Type
+from zlib import crc32
 
 
 @dataclass
@@ -53,7 +53,7 @@ class PNCounter:
             TypeError or ValueError for invalid state_update,
             state_update.clock_uuid, or state_update.data.
         """
-        tert(isinstance(state_update, StateUpdateProtocol),
+        tert(fast_isinstance(state_update, StateUpdateProtocol),
             'state_update must be instance implementing StateUpdateProtocol')
         vert(state_update.clock_uuid == self.clock.uuid,
             'state_update.clock_uuid must equal CRDT.clock.uuid')
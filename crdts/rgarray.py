@@ -12,6 +12,7 @@ from .errors import tert, vert
 from .interfaces import (
     ClockProtocol,
     StateUpdateProtocol,
+    fast_isinstance,
 )
 from .merkle import get_merkle_history, resolve_merkle_histories
 from .orset import ORSet
@@ -40,7 +41,7 @@ class RGArray:
         """
         tert(type(items) in (ORSet, NoneType),
             'items must be ORSet or None')
-        tert(isinstance(clock, ClockProtocol) or clock is None,
+        tert(fast_isinstance(clock, ClockProtocol) or clock is None,
             'clock must be a ClockProtocol or None')
         if listeners is None:
             listeners = []
@@ -102,7 +103,7 @@ class RGArray:
         """Apply an update and return self (monad pattern).  Raises
             TypeError or ValueError for invalid amount or update_class.
         """
-        tert(isinstance(state_update, StateUpdateProtocol),
+        tert(fast_isinstance(state_update, StateUpdateProtocol),
             'state_update must be instance implementing StateUpdateProtocol')
         vert(state_update.clock_uuid == self.clock.uuid,
             'state_update.clock_uuid must equal CRDT.clock.uuid')
@@ -182,7 +183,7 @@ class RGArray:
             update_class=update_class
         )
 
-        tert(isinstance(state_update, StateUpdateProtocol),
+        tert(fast_isinstance(state_update, StateUpdateProtocol),
              'update_class must implement StateUpdateProtocol')
 
         self.update(state_update, inject=inject)
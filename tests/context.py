@@ -8,7 +8,8 @@ from crdts import (
     classes,
     datawrappers,
     interfaces,
-    errors
+    errors,
+    merkle,
 )
 from dataclasses import dataclass, field
 
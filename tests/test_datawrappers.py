@@ -119,6 +119,20 @@ class TestDataWrappers(unittest.TestCase):
         assert dw0 < dw1
         assert dw0 <= dw1
 
+    def test_IntWrapper_equality_ignores_hash_collisions(self):
+        # hash(-1) == hash(-2) in CPython
+        assert datawrappers.IntWrapper(-1) != datawrappers.IntWrapper(-2)
+        assert datawrappers.IntWrapper(-1) == datawrappers.IntWrapper(-1)
+        assert datawrappers.IntWrapper(1) != datawrappers.DecimalWrapper(1)
+
+    def test_FIAItemWrapper_equality_ignores_hash_collisions(self):
+        # hash(-1) == hash(-2) in CPython, so these hash the same
+        fia1 = datawrappers.FIAItemWrapper(-1, Decimal('0.5'), b'123')
+        fia2 = datawrappers.FIAItemWrapper(-2, Decimal('0.5'), b'123')
+        assert hash(fia1) == hash(fia2)
+        assert fia1 != fia2
+        assert fia1 == datawrappers.FIAItemWrapper(-1, Decimal('0.5'), b'123')
+
     # RGAItemWrapper tests
     def test_RGAItemWrapper_implements_DataWrapperProtocol(self):
         rgatw = datawrappers.RGAItemWrapper(
@@ -1,7 +1,9 @@
 from __future__ import annotations
+from concurrent.futures import ThreadPoolExecutor
 from itertools import permutations
-from context import classes, interfaces, datawrappers, errors, StrClock, CustomStateUpdate
+from context import classes, interfaces, datawrappers, errors, merkle, StrClock, CustomStateUpdate
 import packify
+import struct
 import unittest
 
 
@@ -46,6 +48,21 @@ class TestLWWMap(unittest.TestCase):
         assert name in view2
         assert view2[name] == value
 
+    def test_LWWMap_history_returns_fresh_updates(self):
+        lwwmap = classes.LWWMap()
+        foo = datawrappers.StrWrapper('foo')
+        lwwmap.set(foo, datawrappers.StrWrapper('bar'), 1)
+        packed = [update.pack() for update in lwwmap.history()]
+        merkle_history = lwwmap.get_merkle_history()
+
+        # mutating returned updates does not leak into later results
+        for update in (*lwwmap.history(), *lwwmap.registers[foo].history()):
+            update.data = None
+        assert [update.pack() for update in lwwmap.history()] == packed
+        assert lwwmap.get_merkle_history() == merkle_history
+        lwwmap.merkle_cache = None
+        assert lwwmap.get_merkle_history() == merkle_history
+
     def test_LWWMap_unset_returns_StateUpdateProtocol(self):
         lwwmap = classes.LWWMap()
         name = datawrappers.StrWrapper('foo')
@@ -74,6 +91,23 @@ class TestLWWMap(unittest.TestCase):
         for update in history:
             assert isinstance(update, interfaces.StateUpdateProtocol)
 
+    def test_LWWMap_iter_history_yields_same_updates_as_history(self):
+        lwwmap = classes.LWWMap()
+        lwwmap.set(datawrappers.StrWrapper('foo'), datawrappers.StrWrapper('bar'), 1)
+        lwwmap.set(datawrappers.StrWrapper('baz'), datawrappers.StrWrapper('qux'), 1)
+        lwwmap.unset(datawrappers.StrWrapper('baz'), 1)
+        iterator = lwwmap.iter_history()
+        assert not isinstance(iterator, tuple)
+        assert tuple(iterator) == lwwmap.history()
+
+    def test_LWWMap_history_skips_registers_outside_ts_window(self):
+        lwwmap = classes.LWWMap()
+        name = datawrappers.StrWrapper('foo')
+        update = lwwmap.set(name, datawrappers.StrWrapper('bar'), 1)
+        lwwmap.registers[name].write(datawrappers.StrWrapper('baz'), 1)
+        assert lwwmap.history(until_ts=update.ts) == tuple()
+        assert len(lwwmap.history()) == 1
+
     def test_LWWMap_concurrent_writes_bias_to_higher_writer(self):
         lwwmap = classes.LWWMap()
         lwwmap2 = classes.LWWMap()
@@ -192,6 +226,46 @@ class TestLWWMap(unittest.TestCase):
         assert unpacked.clock == lwwm.clock
         assert unpacked.read() == lwwm.read()
 
+    def test_LWWMapView_reads_packed_LWWMap_lazily(self):
+        lwwm = classes.LWWMap()
+        lwwm.set(datawrappers.StrWrapper('foo'), datawrappers.StrWrapper('bar'), 1)
+        lwwm.set(datawrappers.StrWrapper('baz'), datawrappers.IntWrapper(123), 1)
+        lwwm.set(datawrappers.StrWrapper('gone'), datawrappers.IntWrapper(1), 1)
+        lwwm.unset(datawrappers.StrWrapper('gone'), 1)
+
+        view = classes.LWWMapView(lwwm.pack(), inject=self.inject)
+        assert all(type(r) is memoryview for r in view.registers.values())
+        assert view.clock == lwwm.clock
+        assert len(view) == 2
+        assert datawrappers.StrWrapper('gone') not in view
+        assert view[datawrappers.StrWrapper('foo')] == datawrappers.StrWrapper('bar')
+        assert type(view.register(datawrappers.StrWrapper('baz'))) is classes.LWWRegister
+        assert view.read() == lwwm.read()
+
+        with self.assertRaises(KeyError):
+            view[datawrappers.StrWrapper('gone')]
+        with self.assertRaises(ValueError):
+            classes.LWWMapView(lwwm.names.pack())
+
+    def test_LWWMapView_rejects_truncated_or_padded_data(self):
+        lwwm = classes.LWWMap()
+        lwwm.set(datawrappers.StrWrapper('foo'), datawrappers.StrWrapper('bar'), 1)
+        packed = lwwm.pack()
+
+        with self.assertRaises(ValueError) as e:
+            classes.LWWMapView(packed[:-1], inject=self.inject)
+        assert 'length' in str(e.exception)
+        with self.assertRaises(ValueError):
+            classes.LWWMapView(packed[:3], inject=self.inject)
+        with self.assertRaises(ValueError):
+            classes.LWWMapView(packed + b'\x00', inject=self.inject)
+
+        # outer length patched to match, so the last inner item is cut short
+        truncated = packed[:1] + struct.pack('!I', len(packed) - 6) + packed[5:-1]
+        with self.assertRaises(ValueError) as e:
+            classes.LWWMapView(truncated, inject=self.inject)
+        assert 'truncated' in str(e.exception)
+
     def test_LWWMap_with_injected_StateUpdateProtocol_class(self):
         lwwm = classes.LWWMap()
         update = lwwm.set(
@@ -252,6 +326,44 @@ class TestLWWMap(unittest.TestCase):
             lwwmap2.update(update)
         assert lwwmap1.checksums() != lwwmap2.checksums()
 
+    def test_LWWMap_delta_since_and_merge_delta_converge(self):
+        lwwmap1 = classes.LWWMap()
+        lwwmap2 = classes.LWWMap(clock=classes.ScalarClock(0, lwwmap1.clock.uuid))
+        for i in range(5):
+            lwwmap2.update(lwwmap1.set(
+                datawrappers.IntWrapper(i),
+                datawrappers.IntWrapper(i),
+                1
+            ))
+        assert lwwmap1.checksums() == lwwmap2.checksums()
+
+        since = lwwmap1.clock.read()
+        lwwmap1.set(datawrappers.IntWrapper(69420), datawrappers.IntWrapper(1), 1)
+        lwwmap1.unset(datawrappers.IntWrapper(0), 1)
+        delta = lwwmap1.delta_since(since - 1)
+        assert type(delta) is tuple
+        assert len(delta) == 2
+        assert lwwmap1.delta_since(lwwmap1.clock.read()) == tuple()
+
+        packed = lwwmap1.pack_delta(since - 1)
+        assert type(packed) is bytes
+        assert lwwmap2.merge_delta(packed, inject=self.inject) is lwwmap2
+        assert lwwmap1.checksums() == lwwmap2.checksums()
+        assert lwwmap1.read() == lwwmap2.read()
+
+    def test_LWWMap_merge_delta_rejects_malformed_delta_before_applying(self):
+        lwwmap1 = classes.LWWMap()
+        lwwmap2 = classes.LWWMap(clock=classes.ScalarClock(0, lwwmap1.clock.uuid))
+        lwwmap1.set(datawrappers.IntWrapper(1), datawrappers.IntWrapper(1), 1)
+        update = lwwmap1.history()[0].pack()
+        checksums = lwwmap2.checksums()
+
+        with self.assertRaises(TypeError):
+            lwwmap2.merge_delta(packify.pack({b'a': update}), inject=self.inject)
+        with self.assertRaises(TypeError):
+            lwwmap2.merge_delta(packify.pack([update, 'bad']), inject=self.inject)
+        assert lwwmap2.checksums() == checksums
+
     def test_LWWMap_merkle_history_e2e(self):
         lwwm1 = classes.LWWMap()
         lwwm2 = classes.LWWMap(clock=classes.ScalarClock(0, lwwm1.clock.uuid))
@@ -290,6 +402,7 @@ class TestLWWMap(unittest.TestCase):
         ]), 'history must be [[bytes, ], bytes, dict[bytes, bytes]]'
         assert all([leaf_id in history1[2] for leaf_id in history1[1]]), \
             'history[2] dict must have all keys in history[1] list'
+        assert merkle.get_merkle_leaf_ids(lwwm1) == [history1[0], frozenset(history1[1])]
 
         history2 = lwwm2.get_merkle_history()
         assert all([leaf_id in history2[2] for leaf_id in history2[1]]), \
@@ -315,6 +428,53 @@ class TestLWWMap(unittest.TestCase):
         assert lwwm1.checksums() == lwwm2.checksums()
         assert lwwm1.get_merkle_history() == lwwm2.get_merkle_history()
 
+    def test_LWWMap_get_merkle_history_is_cached_until_update(self):
+        lwwm = classes.LWWMap()
+        lwwm.set('foo', 'bar', 1)
+        history = lwwm.get_merkle_history()
+        assert lwwm.merkle_cache is not None
+        history[1].clear()
+        assert lwwm.get_merkle_history() != history
+        assert lwwm.get_merkle_history(update_class=CustomStateUpdate)[0] == \
+            lwwm.get_merkle_history()[0]
+
+        lwwm.set('foo', 'baz', 1)
+        assert lwwm.merkle_cache is None
+        assert lwwm.get_merkle_history()[0] != history[0]
+
+    def test_LWWMap_resolve_merkle_histories_uses_merkle_cache(self):
+        lwwm1 = classes.LWWMap()
+        lwwm2 = classes.LWWMap()
+        lwwm1.set('foo', 'bar', 1)
+        lwwm2.set('baz', 'qux', 2)
+        history1 = lwwm1.get_merkle_history()
+        history2 = lwwm2.get_merkle_history()
+
+        original = merkle._hash_leaves
+        def failing_hash_leaves(leaves, executor=None):
+            raise AssertionError('history should not be rehashed')
+        merkle._hash_leaves = failing_hash_leaves
+        try:
+            assert lwwm1.resolve_merkle_histories(history1) == []
+            assert lwwm1.resolve_merkle_histories(history2) == history2[1]
+        finally:
+            merkle._hash_leaves = original
+
+    def test_LWWMap_merkle_history_parallel_hashing_matches_serial(self):
+        lwwm = classes.LWWMap()
+        for i in range(merkle.PARALLEL_HASH_THRESHOLD):
+            lwwm.set(i, i.to_bytes(4, 'big') * merkle.HASHLIB_GIL_MINSIZE, 1)
+
+        with ThreadPoolExecutor() as executor:
+            history = merkle.get_merkle_history(lwwm, executor=executor)
+        assert history == lwwm.get_merkle_history()
+        assert len(history[1]) == merkle.PARALLEL_HASH_THRESHOLD
+        assert all([
+            merkle.sha256(leaf).digest() == leaf_id
+            for leaf_id, leaf in history[2].items()
+        ])
+        assert history[0] == merkle.sha256(b''.join(history[1])).digest()
+
     def test_LWWMap_event_listeners_e2e(self):
         lwwm = classes.LWWMap()
         logs = []
@@ -1,6 +1,8 @@
 from __future__ import annotations
+from decimal import Decimal
 from context import classes, interfaces, datawrappers, errors, StrClock, CustomStateUpdate
 import packify
+from zlib import crc32
 import unittest
 
 
@@ -79,6 +81,213 @@ class TestLWWRegister(unittest.TestCase):
         assert lwwregister2.checksums() != checksums1
         assert lwwregister1.checksums() != lwwregister2.checksums()
 
+    def test_LWWRegister_packed_field_tracks_attribute_changes(self):
+        register = classes.LWWRegister('test', 'first')
+        packed = register.packed_field('value')
+        assert packed == packify.pack('first')
+        assert register.packed_field('value') is packed
+        register.write('second', 1)
+        assert register.packed_field('value') == packify.pack('second')
+        register.value = 'third'
+        assert register.packed_field('value') == packify.pack('third')
+
+    def test_LWWRegister_field_checksum_tracks_attribute_changes(self):
+        register = classes.LWWRegister('test', 'first')
+        assert register.field_checksum('value') == crc32(packify.pack('first'))
+        assert register.checksums()[2] == register.field_checksum('value')
+        register.write('second', 1)
+        assert register.field_checksum('value') == crc32(packify.pack('second'))
+        assert register.checksums() == (
+            crc32(packify.pack(register.last_update)),
+            crc32(packify.pack(1)),
+            crc32(packify.pack('second')),
+        )
+
+    def test_LWWRegister_read_returns_copy_from_packed_cache(self):
+        register = classes.LWWRegister('test', [1, 2])
+        first = register.read()
+        assert first == [1, 2]
+        first.append(3)
+        assert register.read() == [1, 2]
+        assert register.read() is not register.value
+
+    def test_LWWRegister_read_returns_immutable_values_without_copy(self):
+        register = classes.LWWRegister('test', 'value')
+        assert register.read() is register.value
+        assert register.packed_cache is None
+        for value in (
+            datawrappers.StrWrapper('value'), datawrappers.BytesWrapper(b'value'),
+            datawrappers.IntWrapper(-3), datawrappers.DecimalWrapper(Decimal('1.50')),
+            datawrappers.NoneWrapper(),
+            datawrappers.RGAItemWrapper(datawrappers.StrWrapper('a'), 1, 2),
+        ):
+            register = classes.LWWRegister('test', value)
+            assert register.read() == register.value
+            assert type(register.read()) is type(register.value)
+            assert register.read() is not register.value
+
+    def test_LWWRegister_compare_values_matches_packed_comparison(self):
+        values = [
+            0, 1, 255, 256, 2**32 - 1, b'', b'a', b'b', b'ab', b'\xff',
+            'a', 'ab', 'b', 'é', 'zz', 'ü', '', datawrappers.StrWrapper('a'),
+            datawrappers.StrWrapper('ab'), datawrappers.StrWrapper('é'),
+            datawrappers.StrWrapper('zz'), datawrappers.BytesWrapper(b'b'),
+            datawrappers.BytesWrapper(b'ab'), datawrappers.BytesWrapper(b'\xff'),
+            datawrappers.IntWrapper(0), datawrappers.IntWrapper(5),
+            datawrappers.IntWrapper(-1), datawrappers.IntWrapper(-300),
+            datawrappers.IntWrapper(2**31 - 1), datawrappers.IntWrapper(-2**31),
+            datawrappers.DecimalWrapper(Decimal('1.5')),
+            datawrappers.DecimalWrapper(Decimal('10.25')),
+            datawrappers.DecimalWrapper(Decimal('-2')),
+            None, [1], [b'1', 2],
+        ]
+        for value1 in values:
+            for value2 in values:
+                assert classes.LWWRegister.compare_values(value1, value2) == \
+                    (packify.pack(value1) > packify.pack(value2)), (value1, value2)
+
+    def test_LWWRegister_update_ignores_earlier_update(self):
+        register = classes.LWWRegister('test')
+        old = register.write('old', 2)
+        register.write('new', 1)
+        last_update = register.last_update
+        register.update(old)
+        assert register.read() == 'new'
+        assert register.last_writer == 1
+        assert register.last_update == last_update
+
+    def test_LWWRegister_history_returns_fresh_updates(self):
+        register = classes.LWWRegister('test', 'first')
+        merkle_history = register.get_merkle_history()
+        history = register.history()
+        assert register.history()[0] is not history[0]
+
+        # mutating a returned update does not leak into later results
+        history[0].data = (9, 'mutated')
+        assert register.history()[0].data == (None, 'first')
+        assert register.get_merkle_history() == merkle_history
+
+        register.write('second', 1)
+        assert register.history()[0].data == (1, 'second')
+
+    def test_LWWRegister_checksums_are_cached_until_state_changes(self):
+        register = classes.LWWRegister('test', 'first')
+        checksums = register.checksums()
+        assert register.checksums() is checksums
+        register.write('second', 1)
+        assert register.checksums() is not checksums
+        assert register.checksums() == (
+            crc32(packify.pack(register.last_update)),
+            crc32(packify.pack(1)),
+            crc32(packify.pack('second')),
+        )
+
+    def test_LWWRegister_uses_slots(self):
+        register = classes.LWWRegister('test', 'value')
+        assert not hasattr(register, '__dict__')
+        with self.assertRaises(AttributeError):
+            register.something_else = 1
+
+    def test_LWWRegister_caches_are_built_lazily(self):
+        register = classes.LWWRegister('test', 'value', last_writer=1)
+        assert register.packed_cache is None
+        assert register.checksums() == (
+            crc32(packify.pack(register.last_update)),
+            crc32(packify.pack(1)),
+            crc32(packify.pack('value')),
+        )
+        # small scalar fields are packed on demand rather than cached
+        assert set(register.packed_cache) == {'value'}
+
+    def test_LWWRegister_apply_many_matches_sequential_updates(self):
+        source = classes.LWWRegister('test')
+        updates = [
+            classes.StateUpdate(source.clock.uuid, ts, (writer, value))
+            for ts, writer, value in [
+                (3, 1, 'a'), (1, 2, 'b'), (3, 2, b'c'), (3, 2, b'bb'),
+                (2, 5, 'd'), (3, 2, b'ba'), (1, 9, 'e'),
+            ]
+        ]
+        for batch in (updates, updates[::-1], updates[2:5]):
+            clock1 = classes.ScalarClock(uuid=source.clock.uuid)
+            clock2 = classes.ScalarClock(uuid=source.clock.uuid)
+            sequential = classes.LWWRegister('test', clock=clock1)
+            batched = classes.LWWRegister('test', clock=clock2)
+            for update in batch:
+                sequential.update(update)
+            assert batched.apply_many(batch) is batched
+            assert batched.read() == sequential.read()
+            assert batched.last_update == sequential.last_update
+            assert batched.last_writer == sequential.last_writer
+            assert batched.clock.read() == sequential.clock.read()
+            assert batched.checksums() == sequential.checksums()
+
+    def test_LWWRegister_apply_many_validates_before_applying(self):
+        register = classes.LWWRegister('test')
+        logs = []
+        register.add_listener(lambda update: logs.append(update))
+        good = classes.StateUpdate(register.clock.uuid, 1, (1, 'value'))
+        bad = classes.StateUpdate(b'other uuid', 2, (1, 'value'))
+        with self.assertRaises(ValueError):
+            register.apply_many([good, bad])
+        assert register.read() is None
+        assert logs == []
+
+        register.apply_many([good, good])
+        assert register.read() == 'value'
+        assert logs == [good, good]
+
+    def test_LWWRegister_write_matches_update(self):
+        register1 = classes.LWWRegister('test')
+        clock = classes.ScalarClock.unpack(register1.clock.pack())
+        register2 = classes.LWWRegister('test', clock=clock)
+        logs = []
+        register1.add_listener(lambda update: logs.append(update))
+
+        for value, writer in [('a', 1), ('b', 2), ('c', 1)]:
+            update = register1.write(value, writer)
+            register2.update(update)
+            assert logs[-1] is update
+            assert register1.read() == register2.read() == value
+            assert register1.last_update == register2.last_update == update.ts
+            assert register1.clock.read() == register2.clock.read()
+
+        # a register initialized ahead of its clock still resolves ties
+        register3 = classes.LWWRegister('test', 'z', last_update=5, last_writer=9)
+        register3.write('y', 1)
+        assert register3.read() == 'z'
+
+    def test_LWWRegister_pack_matches_packify_list(self):
+        register = classes.LWWRegister(
+            datawrappers.StrWrapper('test'), [1, 'two', b'three']
+        )
+        for value in ('a', datawrappers.IntWrapper(3), None):
+            assert register.pack() == packify.pack([
+                register.name, register.clock, register.value,
+                register.last_update, register.last_writer,
+            ])
+            register.write(value, 1)
+
+    def test_LWWRegister_merkle_history_is_cached_until_state_changes(self):
+        register = classes.LWWRegister('test', 'first')
+        history = register.get_merkle_history()
+        cached = register.merkle_cache
+        assert register.get_merkle_history() == history
+        assert register.merkle_cache is cached
+
+        # returned containers are copies of the cache
+        history[1].clear()
+        history[2].clear()
+        assert register.get_merkle_history()[1]
+
+        register.write('second', 1)
+        updated = register.get_merkle_history()
+        assert updated[0] != history[0]
+        assert register.merkle_cache is not cached
+        assert updated == classes.LWWRegister.unpack(
+            register.pack()
+        ).get_merkle_history()
+
     def test_LWWRegister_update_is_idempotent(self):
         lwwregister1 = classes.LWWRegister(datawrappers.StrWrapper('test'))
         clock1 = classes.ScalarClock.unpack(lwwregister1.clock.pack())
@@ -1,6 +1,6 @@
 from __future__ import annotations
 from itertools import permutations
-from context import classes, interfaces, datawrappers, errors, StrClock, CustomStateUpdate
+from context import classes, interfaces, datawrappers, errors, merkle, StrClock, CustomStateUpdate
 import packify
 import unittest
 
@@ -111,6 +111,67 @@ class TestMVMap(unittest.TestCase):
         assert checksums1 != checksums3
         assert checksums2 != checksums3
 
+    def test_MVMap_checksums_cache_tracks_register_changes(self):
+        mvmap1 = classes.MVMap()
+        mvmap2 = classes.MVMap(clock=classes.ScalarClock(uuid=mvmap1.clock.uuid))
+        foo = datawrappers.StrWrapper('foo')
+
+        def uncached(mvmap):
+            mvmap.checksum_cache.clear()
+            return mvmap.checksums()
+
+        mvmap1.set(foo, datawrappers.StrWrapper('bar'))
+        assert mvmap1.checksums() == uncached(mvmap1)
+
+        # concurrent update appends to the existing values list
+        update = mvmap2.set(foo, datawrappers.StrWrapper('baz'))
+        mvmap1.checksums()
+        mvmap1.update(update)
+        assert len(mvmap1.registers[foo].values) == 2
+        assert mvmap1.checksums() == uncached(mvmap1)
+
+        mvmap1.set(foo, datawrappers.StrWrapper('later'))
+        assert mvmap1.checksums() == uncached(mvmap1)
+
+        mvmap1.unset(foo)
+        assert foo not in mvmap1.checksum_cache
+        assert mvmap1.checksums() == uncached(mvmap1)
+
+    def test_MVMap_caches_track_same_ts_concurrent_write(self):
+        mvmap = classes.MVMap()
+        foo = datawrappers.StrWrapper('foo')
+        a = datawrappers.StrWrapper('a')
+        b = datawrappers.StrWrapper('b')
+        update = mvmap.set(foo, b)
+        # values received out of order are sorted by the next concurrent write
+        register = mvmap.registers[foo]
+        register.values = [b, a]
+        mvmap.checksums()
+        mvmap.history()
+
+        # a duplicate concurrent write at the same ts only reorders values
+        mvmap.update(classes.StateUpdate(mvmap.clock.uuid, update.ts, ('o', foo, a)))
+        assert mvmap.read()[foo] == (a, b)
+        checksums = mvmap.checksums()
+        history = mvmap.history()
+
+        mvmap.checksum_cache.clear()
+        assert checksums == mvmap.checksums()
+        assert history == mvmap.history()
+
+    def test_MVMap_history_returns_fresh_updates(self):
+        mvmap = classes.MVMap()
+        foo = datawrappers.StrWrapper('foo')
+        mvmap.set(foo, datawrappers.StrWrapper('bar'))
+        packed = [update.pack() for update in mvmap.history()]
+        merkle_history = mvmap.get_merkle_history()
+
+        # mutating returned updates does not leak into later results
+        for update in (*mvmap.history(), *mvmap.registers[foo].history()):
+            update.data = None
+        assert [update.pack() for update in mvmap.history()] == packed
+        assert mvmap.get_merkle_history() == merkle_history
+
     def test_MVMap_update_is_idempotent(self):
         mvmap = classes.MVMap()
         update = mvmap.set(datawrappers.StrWrapper('foo'), datawrappers.StrWrapper('bar'))
@@ -165,6 +226,15 @@ class TestMVMap(unittest.TestCase):
 
         assert unpacked.checksums() == mvmap.checksums()
 
+    def test_MVMap_pack_matches_packify_list(self):
+        mvmap = classes.MVMap()
+        assert mvmap.pack() == packify.pack([mvmap.clock, mvmap.names, mvmap.registers])
+        mvmap.set(datawrappers.StrWrapper('foo'), datawrappers.StrWrapper('bar'))
+        mvmap.set('baz', 123)
+        mvmap.set(datawrappers.IntWrapper(3), b'bytes')
+        mvmap.unset('baz')
+        assert mvmap.pack() == packify.pack([mvmap.clock, mvmap.names, mvmap.registers])
+
     def test_MVMap_pack_unpack_e2e_with_injected_clock(self):
         mvm = classes.MVMap(clock=StrClock())
         mvm.set(
@@ -247,6 +317,64 @@ class TestMVMap(unittest.TestCase):
             mvmap2.update(update)
         assert mvmap1.checksums() != mvmap2.checksums()
 
+    def test_MVMap_register_updates_skip_revalidation_but_notify(self):
+        mvmap = classes.MVMap()
+        mvmap.set(datawrappers.StrWrapper('name'), datawrappers.StrWrapper('first'))
+        register = mvmap.registers[datawrappers.StrWrapper('name')]
+        logs = []
+        register.add_listener(lambda update: logs.append(update))
+
+        validated = []
+        original = classes.MVRegister.update
+        def counting_update(self, update):
+            validated.append(update)
+            return original(self, update)
+        classes.MVRegister.update = counting_update
+        try:
+            mvmap.set(datawrappers.StrWrapper('name'), datawrappers.StrWrapper('second'))
+        finally:
+            classes.MVRegister.update = original
+
+        assert validated == []
+        assert len(logs) == 1
+        assert logs[0].data == datawrappers.StrWrapper('second')
+        assert mvmap.read()[datawrappers.StrWrapper('name')] == (
+            datawrappers.StrWrapper('second'),
+        )
+
+    def test_MVMap_uses_slots(self):
+        mvmap = classes.MVMap()
+        assert not hasattr(mvmap, '__dict__')
+        with self.assertRaises(AttributeError):
+            mvmap.something_else = 1
+
+    def test_MVMap_merkle_history_only_hashes_new_updates(self):
+        mvmap = classes.MVMap()
+        mvmap.set('foo', 'bar')
+        mvmap.set('baz', 123)
+
+        hashed = []
+        original = merkle._hash_leaves
+        def counting_hash_leaves(leaves, executor=None):
+            hashed.extend(leaves)
+            return original(leaves, executor)
+        merkle._hash_leaves = counting_hash_leaves
+        try:
+            history1 = mvmap.get_merkle_history()
+            assert len(hashed) == 2
+            assert sorted(mvmap.leaf_id_cache.values()) == history1[1]
+            assert mvmap.get_merkle_history() == history1
+            assert len(hashed) == 2
+
+            mvmap.set('new', 'value')
+            history2 = mvmap.get_merkle_history()
+            assert len(hashed) == 3
+        finally:
+            merkle._hash_leaves = original
+
+        mvmap2 = classes.MVMap.unpack(mvmap.pack())
+        assert mvmap2.get_merkle_history() == history2
+
     def test_MVMap_merkle_history_e2e(self):
         mvm1 = classes.MVMap()
         mvm2 = classes.MVMap(clock=classes.ScalarClock(0, mvm1.clock.uuid))
@@ -2,6 +2,7 @@ from __future__ import annotations
 from decimal import Decimal
 from context import classes, interfaces, datawrappers, errors, StrClock, CustomStateUpdate
 import packify
+from zlib import crc32
 import unittest
 
 
@@ -41,6 +42,24 @@ class TestMVRegister(unittest.TestCase):
         assert type(mvregister.read()[0]) is str
         assert mvregister.read()[0] == 'foobar'
 
+    def test_MVRegister_read_returns_copies_of_mutable_values(self):
+        wrappers = [
+            datawrappers.StrWrapper('value'), datawrappers.BytesWrapper(b'value'),
+            datawrappers.IntWrapper(-3), datawrappers.DecimalWrapper(Decimal('1.50')),
+            datawrappers.NoneWrapper(),
+            datawrappers.RGAItemWrapper(datawrappers.StrWrapper('a'), 1, 2),
+        ]
+        values = ['value', b'value', 3, None, [1, 2], *wrappers]
+        mvregister = classes.MVRegister('test', values)
+        view = mvregister.read()
+        assert view == tuple(values)
+        for value, read in zip(values, view):
+            assert type(read) is type(value)
+            if type(value) in (str, bytes, int, type(None)):
+                assert read is value
+            else:
+                assert read is not value
+
     def test_MVRegister_write_returns_StateUpdate_and_sets_values(self):
         mvregister = classes.MVRegister(
             datawrappers.StrWrapper('test'),
@@ -77,6 +96,74 @@ class TestMVRegister(unittest.TestCase):
         assert mvregister1.read() == mvregister2.read()
         assert mvregister1.read() == expected
 
+    def test_MVRegister_concurrent_values_sorted_by_packed_values(self):
+        mvregister = classes.MVRegister('test')
+        values = [
+            datawrappers.StrWrapper('foobar'), 'b', b'c', 3, 'aa',
+            datawrappers.IntWrapper(-2), datawrappers.StrWrapper('bar'), 0,
+        ]
+        for value in values:
+            mvregister.update(classes.StateUpdate(mvregister.clock.uuid, 0, value))
+
+        assert mvregister.values == sorted(values, key=packify.pack)
+        assert mvregister.packed_values() == [packify.pack(v) for v in mvregister.values]
+        assert mvregister.checksums() == (
+            crc32(packify.pack(mvregister.last_update)),
+            sum([crc32(packify.pack(v)) for v in values]) % 2**32,
+        )
+
+        # initial values are sorted before the first concurrent insert
+        mvregister = classes.MVRegister('test', ['c', 'a'])
+        assert mvregister.read() == ('c', 'a')
+        mvregister.update(classes.StateUpdate(mvregister.clock.uuid, 0, 'b'))
+        assert mvregister.read() == ('a', 'b', 'c')
+
+    def test_MVRegister_concurrent_duplicates_detected_by_packed_value(self):
+        values = [
+            datawrappers.DecimalWrapper(Decimal('1.0')),
+            datawrappers.DecimalWrapper(Decimal('1.00')),
+            'a', 'a',
+        ]
+        mvregister1 = classes.MVRegister('test')
+        mvregister2 = classes.MVRegister('test')
+        mvregister2.clock.uuid = mvregister1.clock.uuid
+        for value in values:
+            mvregister1.update(classes.StateUpdate(mvregister1.clock.uuid, 0, value))
+        for value in reversed(values):
+            mvregister2.update(classes.StateUpdate(mvregister2.clock.uuid, 0, value))
+
+        # equal values that pack differently are both kept on every replica
+        assert len(mvregister1.values) == 3
+        assert mvregister1.pack() == mvregister2.pack()
+        assert mvregister1.checksums() == mvregister2.checksums()
+
+    def test_MVRegister_packed_values_cached_until_values_change(self):
+        mvregister = classes.MVRegister('test', ['foobar'])
+        packed_values = mvregister.packed_values()
+        assert mvregister.packed_values() is packed_values
+        mvregister.write('thing')
+        assert mvregister.packed_values() is not packed_values
+        assert mvregister.packed_values() == [packify.pack('thing')]
+        mvregister.values.append('other')
+        assert mvregister.packed_values() == [
+            packify.pack('thing'), packify.pack('other')
+        ]
+
+    def test_MVRegister_checksums_running_total_matches_recomputed(self):
+        mvregister = classes.MVRegister('test')
+        for value in ['b', 3, b'c', datawrappers.StrWrapper('a'), 'b']:
+            checksums = mvregister.checksums()
+            assert mvregister.checksums() is checksums
+            mvregister.update(classes.StateUpdate(mvregister.clock.uuid, 0, value))
+            fresh = classes.MVRegister('test', list(mvregister.values))
+            assert mvregister.checksums() == fresh.checksums()
+
+        mvregister.write('later')
+        assert mvregister.checksums() == (
+            crc32(packify.pack(mvregister.last_update)),
+            crc32(packify.pack('later')),
+        )
+
     def test_MVRegister_checksums_returns_tuple_of_int(self):
         mvregister = classes.MVRegister(
             datawrappers.StrWrapper('test'),
@@ -176,6 +263,17 @@ class TestMVRegister(unittest.TestCase):
         assert unpacked.clock == mvregister.clock
         assert unpacked.read() == mvregister.read()
 
+    def test_MVRegister_pack_matches_packify(self):
+        mvregister = classes.MVRegister(datawrappers.StrWrapper('test'))
+        for value in ['b', 3, datawrappers.StrWrapper('a'), [1, 'x'], None]:
+            mvregister.update(classes.StateUpdate(mvregister.clock.uuid, 0, value))
+            assert mvregister.pack() == packify.pack([
+                mvregister.name,
+                mvregister.clock,
+                mvregister.last_update,
+                mvregister.values,
+            ])
+
     def test_MVRegister_pack_unpack_e2e_with_injected_clock(self):
         mvregister = classes.MVRegister(
             name=datawrappers.StrWrapper('test register'),
@@ -264,6 +362,40 @@ class TestMVRegister(unittest.TestCase):
 
         assert mvr1.checksums() == mvr2.checksums()
 
+    def test_MVRegister_merkle_history_is_cached_and_history_is_fresh(self):
+        mvregister = classes.MVRegister('test', ['first'])
+        merkle_history = mvregister.get_merkle_history()
+        cached = mvregister.merkle_cache
+        assert mvregister.get_merkle_history() == merkle_history
+        assert mvregister.merkle_cache is cached
+
+        # mutating a returned update does not leak into later results
+        history = mvregister.history()
+        assert mvregister.history()[0] is not history[0]
+        history[0].data = 'mutated'
+        assert mvregister.history()[0].data == 'first'
+        assert mvregister.get_merkle_history() == merkle_history
+
+        # a concurrent value replaces values with a longer list
+        mvregister.update(classes.StateUpdate(
+            mvregister.clock.uuid, mvregister.last_update, 'second'
+        ))
+        assert len(mvregister.history()) == 2
+        updated = mvregister.get_merkle_history()
+        assert updated[0] != merkle_history[0]
+        assert updated == classes.MVRegister.unpack(
+            mvregister.pack()
+        ).get_merkle_history()
+
+        mvregister.write('third')
+        assert [u.data for u in mvregister.history()] == ['third']
+
+    def test_MVRegister_uses_slots(self):
+        mvregister = classes.MVRegister('test', ['value'])
+        assert not hasattr(mvregister, '__dict__')
+        with self.assertRaises(AttributeError):
+            mvregister.something_else = 1
+
     def test_MVRegister_event_listeners_e2e(self):
         mvr = classes.MVRegister('test')
         logs = []
@@ -2,6 +2,7 @@ from __future__ import annotations
 from dataclasses import dataclass, field, is_dataclass
 from decimal import Decimal
 from context import classes, interfaces, datawrappers, errors
+import packify
 import unittest
 
 
@@ -24,6 +25,48 @@ class TestStateUpdate(unittest.TestCase):
         assert is_dataclass(update)
         assert isinstance(update, interfaces.StateUpdateProtocol)
 
+    def test_StateUpdate_fast_isinstance_matches_isinstance(self):
+        update = classes.StateUpdate(b'123', 123, 321)
+        for _ in range(2):
+            assert interfaces.fast_isinstance(update, interfaces.StateUpdateProtocol)
+            assert not interfaces.fast_isinstance(123, interfaces.StateUpdateProtocol)
+            assert not interfaces.fast_isinstance(update, interfaces.ClockProtocol)
+
+        # data members are checked per object, not cached by type
+        partial = classes.StateUpdate(b'123', 123, 321)
+        del partial.data
+        assert not isinstance(partial, interfaces.StateUpdateProtocol)
+        assert not interfaces.fast_isinstance(partial, interfaces.StateUpdateProtocol)
+        assert interfaces.fast_isinstance(update, interfaces.StateUpdateProtocol)
+
+    def test_is_serializable_matches_isinstance_SerializableType(self):
+        values = [
+            1, True, 1.5, Decimal('1.5'), 'str', b'bytes', bytearray(b'ba'),
+            None, [1], (1,), {1}, {1: 2}, datawrappers.StrWrapper('str'),
+            classes.StateUpdate(b'123', 123, 321), object(), len,
+        ]
+        for _ in range(2):
+            for value in values:
+                assert interfaces.is_serializable(value) == \
+                    isinstance(value, packify.SerializableType), value
+
+    def test_fast_pack_matches_packify_pack(self):
+        values = [
+            0, 1, 2**32 - 1, 'str', 'ünï', '', b'bytes', b'', None, 1.5,
+            Decimal('1.5'), bytearray(b'ba'), [1, 'a'], (1,), {1: 2},
+            datawrappers.StrWrapper('str'), classes.StateUpdate(b'123', 123, 321),
+            datawrappers.IntWrapper(3), classes.ScalarClock(),
+            datawrappers.RGAItemWrapper(datawrappers.StrWrapper('a'), 1, 2),
+        ]
+        for value in values:
+            assert interfaces.fast_pack(value) == packify.pack(value), value
+
+        for value in (-1, 2**32):
+            with self.assertRaises(Exception) as expected:
+                packify.pack(value)
+            with self.assertRaises(type(expected.exception)):
+                interfaces.fast_pack(value)
+
     def test_StateUpdate_pack_returns_bytes(self):
         update = classes.StateUpdate(b'123', 123, 321)
         assert type(update.pack()) is bytes